@@ -74,9 +74,9 @@ def dropout_augment_wrapper(image_size=512, dropout_probability=0.1, normalize=F
         augments.append(A.ToTensorV2())
     return A.Compose(augments)
 
-def get_augmented_image(augmentation, image_path):
+def get_augmented_jpg(augmentation, image_path):
     """
-    Augments given image and returns a PIL object of the image
+    Augments given image and returns the jpg encoded bytes of the image
     
     Args:
         augmentation (albumentation): augmentation
@@ -97,17 +97,30 @@ def get_augmented_image(augmentation, image_path):
     image = cv2.imread(image_path)
     # apply transform, the augmentation returns a numpy array
     augmented_nparray = augmentation(image=image)['image'] 
-    # get rgb of the np array
-    augmented_nparray_rgb = cv2.cvtColor(augmented_nparray, cv2.COLOR_BGR2RGB)
-    # encode rgb np array to jpg
-    success, jpg = cv2.imencode(".jpg", augmented_nparray_rgb)
+    # encode np array to jpg, cv2 reads and encodes images in BGR order so the array is encoded without conversion
+    success, jpg = cv2.imencode(".jpg", augmented_nparray)
     # return jpg encoded bytes
     if success:
-        jpg_bytes = jpg.tobytes()
-        image = Image.open(BytesIO(jpg_bytes))
-        return image
+        return jpg.tobytes()
     else:
         raise ValueError("jpg encoding was not successful.")
+
+def get_augmented_image(augmentation, image_path):
+    """
+    Augments given image and returns a PIL object of the image
+    
+    Args:
+        augmentation (albumentation): augmentation
+        image_path (str): path to image
+
+    Raises:
+        FileNotFoundError: path not found
+        IsADirectoryError: path is a dir
+
+    Returns:
+        PIL.Image.Image: jpg image
+    """
+    return Image.open(BytesIO(get_augmented_jpg(augmentation=augmentation, image_path=image_path)))
     
 def show_augmented_image(augmentation, image_path):
     image = get_augmented_image(augmentation=augmentation,image_path=image_path)
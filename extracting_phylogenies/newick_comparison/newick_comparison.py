@@ -1,19 +1,47 @@
 from extracting_phylogenies.utilities import newick_util as ut 
 import argparse # argument parsing 
-import nltk # Levenshtein
+from rapidfuzz import process # pairwise score matrices
+from rapidfuzz.distance import Levenshtein, Hamming # bit-parallel Levenshtein, SIMD Hamming
+import numpy as np
+try:
+    from numba import njit # JIT compilation of the greedy picking loop
+except ImportError:
+    # numba is optional, without it the decorated functions run as plain python
+    def njit(*args, **kwargs):
+        return lambda function: function
 from ete3 import Tree # turn newick into tree structure
 import os # for checking outfile paths of the tsv
 import sys
 import logging
-from itertools import combinations
-from statistics import mean, median
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor # comparing many newick pairs in parallel
+from functools import cached_property
+from itertools import repeat
 
 # create logger
 console_logger = logging.getLogger(__name__)
 
+# keys of the comparison dicts in the order of their columns in the .tsv
+TAXA_COMP_KEYS = (
+    "taxa_count_original", "taxa_count_generated", "correct_taxa_ratio", "count_equal_length", "count_unequal_length",
+    "mean_hamming_distance", "mean_hamming_distance_ratio", "mean_edit_distance", "mean_edit_distance_total", 
+    "mean_edit_ratio", "mean_edit_ratio_total",
+)
+DIST_COMP_KEYS = (
+    "mean_abs_diff", "median_abs_diff", "mean_neg_diff", "median_neg_diff", "mean_pos_diff", "median_pos_diff", 
+    "mean_pairwise_diff", "median_pairwise_diff",
+)
+TOPO_COMP_KEYS = (
+    "rf", "max_rf", "rf_ratio", "count_original_edges", "ref_edges_in_source", "count_missing_edges", 
+    "count_common_edges", "correct_edges_ratio", 
+    # "treeko_dist", # TODO treeko dist always NA
+    "count_multifurcations_original", "count_multifurcations_generated",
+)
+
 def get_newick_from_file(path):
     """
-    Given a path to a newick file returns the newick.
+    Given a path to a newick file returns the newick and its format. The format is determined while checking if the 
+    newick is valid so it doesn't have to be determined again.
 
     Args:
         path (str): path to newick file
@@ -22,50 +50,40 @@ def get_newick_from_file(path):
         FileNotFoundError: if file doesnt exist
         IsADirectoryError: if path is a directory path
         ValueError: if Newick is not valid   
+
+    Returns:
+        tuple(str, int): newick and its format (0, 5, 9 or 100)
     """
-    if not os.path.exists(path):
+    # open() already fails for missing files and directories, no need to stat the path beforehand
+    try:
+        with open(path, "r") as nwk_file:
+            newick = nwk_file.read()
+    except FileNotFoundError:
         raise FileNotFoundError("File doesn't exist.")
-    elif os.path.isdir(path):
+    except IsADirectoryError:
         raise IsADirectoryError("Expected filepath but got directory path.")
-    with open(path, "r") as nwk_file:
-        newick = nwk_file.read()
-    # check if newick is valid 
-    try:
-        ut.get_newick_format(newick)
-        return newick
-    except Exception as e:
-        raise e 
+    # check if newick is valid and get its format
+    return newick, ut.get_newick_format(newick)
 
 def get_filename(filepath):
     """
-    Given a filepath returns the files name.
-    Throws exceptions if path doesnt exist or isnt a filepath. 
+    Given a filepath returns the files name. 
+    The path isn't checked since the file has already been read by get_newick_from_file.
 
     Args:
         filepath (str): path to a file
 
-    Raises:
-        IsADirectoryError: If the path is a directory path
-        FileNotFoundError: if the path doesnt exist
-
     Returns:
         str: name of the file
     """
-    if os.path.exists(filepath): 
-        if os.path.isfile(filepath):
-            _, tail = os.path.split(filepath)
-            return tail
-        else:
-            raise IsADirectoryError("Expected a filepath but got a directory path.")
-    else:
-        raise FileNotFoundError("Path is not valid.")
+    return os.path.basename(filepath)
     
 # for comparison of taxa especially those with single character substitutions
 # problem: insertions and deletions of characters
 def hamming_distance(str1, str2):
     """
     Given two strings of equal length calculates the hamming distance.
-    Returns None if strings arent of equal length.
+    Raises ValueError if strings arent of equal length.
 
     Args:
         str1 (str): first string
@@ -76,16 +94,36 @@ def hamming_distance(str1, str2):
     """
     if not len(str1) == len(str2):
         raise ValueError(f"Strings have to be of equal length.")
-    hamming_distance = 0
-    for index in range(len(str1)):
-        if not str1[index] == str2[index]:
-            hamming_distance += 1
-    return hamming_distance
-
-def edit_distance_ratio(original_taxon, generated_taxon):
-    return 1 - (nltk.edit_distance(original_taxon, generated_taxon, substitution_cost=1, transpositions=False)
-                /max(len(original_taxon),len(generated_taxon)))
-    
+    return Hamming.distance(str1, str2)
+
+@njit(cache=True)
+def pick_columns_greedy(scores, threshold):
+    """
+    Given a score matrix iterates through its rows and greedily picks the column with the highest score if that score 
+    is above the threshold. Picked columns can't be picked again. The score matrix is modified in place.
+
+    Args:
+        scores (np.ndarray): 2D float matrix with scores
+        threshold (float): scores have to be above this value to be picked
+
+    Returns:
+        tuple(np.ndarray, np.ndarray): picked column of each row (-1 if none was picked) and its score
+    """
+    count_rows, count_columns = scores.shape
+    picked_columns = np.full(count_rows, -1, dtype=np.int64)
+    picked_scores = np.zeros(count_rows, dtype=np.float64)
+    if count_columns == 0:
+        return picked_columns, picked_scores
+    for row in range(count_rows):
+        # first column with the highest score, same tie-breaking as max() over a list
+        column = np.argmax(scores[row])
+        if scores[row, column] > threshold:
+            picked_columns[row] = column
+            picked_scores[row] = scores[row, column]
+            # mask the picked column so it can't be picked again
+            scores[:, column] = -np.inf
+    return picked_columns, picked_scores
+
 def get_taxon_pairs_greedy(original_taxa, generated_taxa):
     """
     Given a dictionary with two lists: mismatched original taxa and mismatched generated taxa,
@@ -103,24 +141,201 @@ def get_taxon_pairs_greedy(original_taxa, generated_taxa):
         original_taxa (List(str)): List of original taxa 
         generated_taxa (List(str)): List of generated taxa 
     Returns:
-        dict: dict with original_taxon/generated_taxa pairs
+        tuple(dict, dict): dict with original_taxon/generated_taxa pairs and dict with the edit distance of each pair 
+        and the length of its longer taxon i.e. original_taxon/(edit distance, max length) pairs 
     """
     if not (orig:=len(original_taxa)) == (gen:=len(generated_taxa)):
         console_logger.info(
             f"Amount of taxa in original and generated newick do not match. Original: {orig}. Generated: {gen}."
         )
+    # edit distance of every original taxon to every generated taxon, computed once
+    # a ratio above 0.75 requires a distance below a quarter of the longer taxon so larger distances are only bounded
+    # spreading the rows over all cores only pays off for larger trees, below that the thread startup dominates
+    max_lengths = np.maximum.outer(
+        np.array([len(taxon) for taxon in original_taxa], dtype=np.int64), 
+        np.array([len(taxon) for taxon in generated_taxa], dtype=np.int64),
+    )
+    distances = process.cdist(
+        original_taxa, 
+        generated_taxa, 
+        scorer=Levenshtein.distance, 
+        score_cutoff=int(0.25 * max_lengths.max()) if max_lengths.size else 0,
+        dtype=np.int32,
+        workers=-1 if len(original_taxa) >= 50 else 1,
+    )
+    # edit distance ratio = 1 - edit distance/max length
+    scores = 1 - distances / max_lengths
+    picked_columns, _ = pick_columns_greedy(scores, 0.75)
     pair_dict = dict()
-    for original_taxon in original_taxa:
-        score_dict = dict()
-        for generated_taxon in generated_taxa:
-            score_dict[generated_taxon] = edit_distance_ratio(original_taxon, generated_taxon)
-        if score_dict and max(score_dict.values()) > 0.75:    
-            pair_dict[original_taxon] = max(score_dict, key=score_dict.get)
-            # remove the generated taxon that was just assigned from the list of generated taxa
-            generated_taxa.remove(pair_dict[original_taxon])
+    distance_dict = dict()
+    for row, (original_taxon, column) in enumerate(zip(original_taxa, picked_columns)):
+        if column >= 0:
+            pair_dict[original_taxon] = generated_taxa[column]
+            distance_dict[original_taxon] = (int(distances[row, column]), int(max_lengths[row, column]))
         else: 
             pair_dict[original_taxon] = ""
-    return pair_dict 
+            # edit distance to the empty string is the length of the original taxon
+            distance_dict[original_taxon] = (len(original_taxon), len(original_taxon))
+    return pair_dict, distance_dict
+
+def rename_taxa(newick, taxa_pairs):
+    """
+    Given a newick and a dict with original_taxon/generated_taxon pairs replaces every generated taxon inside the 
+    newick with its original taxon in a single regex pass. Only whole taxa are replaced, so a taxon that is part of 
+    another taxon or a taxon that is renamed to another generated taxon is handled correctly.
+
+    Args:
+        newick (str): generated newick
+        taxa_pairs (dict): dict with original_taxon/generated_taxon pairs, unpaired original taxa have value ""
+
+    Returns:
+        str: newick with original taxa
+    """
+    renaming = {generated: original for original, generated in taxa_pairs.items() if generated}
+    return ut.TAXA_PATTERN.sub(lambda match: renaming.get(match.group(0), match.group(0)), newick)
+
+def count_multifurcations(tree):
+    """
+    Given an ete3 tree returns the amount of nodes with more than 2 children. Same as ut.count_multifurcations but for 
+    trees that were already parsed.
+
+    Args:
+        tree (Tree): ete3 tree
+
+    Returns:
+        int: amount of multifurcations
+    """
+    return sum(1 for node in tree.traverse() if len(node.children) > 2)
+
+def get_pairwise_distances(tree, taxa):
+    """
+    Given an ete3 tree and a list of taxa returns a matrix with the path lengths between all pairs of the taxa.
+    Instead of walking the path between every pair of leaves, the distance of every node to the root (its depth) is 
+    computed once and the depth of the lowest common ancestor (lca) of all leaf pairs is filled in with a single 
+    postorder traversal: distance(a, b) = depth(a) + depth(b) - 2 * depth(lca(a, b))
+
+    Args:
+        tree (Tree): ete3 tree
+        taxa (List(str)): leaf names that each appear exactly once in the tree
+
+    Returns:
+        np.ndarray: symmetric matrix with the distance of taxa[i] and taxa[j] at [i, j]
+    """
+    taxon_indices = {taxon: index for index, taxon in enumerate(taxa)}
+    # the branch above the root doesn't belong to any path between two leaves
+    depths = dict()
+    for node in tree.traverse("preorder"):
+        depths[node] = depths[node.up] + node.dist if node.up else 0.0
+    leaf_depths = np.zeros(len(taxa))
+    lca_depths = np.zeros((len(taxa), len(taxa)))
+    # indices of the given taxa below each node whose parent hasn't been visited yet
+    indices_below = dict()
+    for node in tree.traverse("postorder"):
+        if node.is_leaf():
+            if node.name in taxon_indices:
+                indices_below[node] = [taxon_indices[node.name]]
+                leaf_depths[taxon_indices[node.name]] = depths[node]
+            else:
+                indices_below[node] = []
+            continue
+        children_indices = [indices_below.pop(child) for child in node.children]
+        # node is the lca of every pair of leaves that are below two different children
+        for position, first_indices in enumerate(children_indices):
+            for second_indices in children_indices[position + 1:]:
+                if first_indices and second_indices:
+                    lca_depths[np.ix_(first_indices, second_indices)] = depths[node]
+                    lca_depths[np.ix_(second_indices, first_indices)] = depths[node]
+        indices_below[node] = [index for indices in children_indices for index in indices]
+    return leaf_depths[:, np.newaxis] + leaf_depths[np.newaxis, :] - 2 * lca_depths
+
+def get_bipartitions(tree, taxon_bits):
+    """
+    Given an ete3 tree and a dict that assigns each taxon a single bit returns the set of bipartitions of the tree.
+    Every node splits the taxa into the taxa below it and all other taxa. Each bipartition is encoded as the bitmask of 
+    the side that doesn't contain the taxon with bit 0, i.e. the lexicographically smallest taxon. Taxa without a bit 
+    are ignored.
+
+    Args:
+        tree (Tree): ete3 tree
+        taxon_bits (dict): dict with taxon/bit pairs, bits are consecutive powers of 2 starting at 1
+
+    Returns:
+        set(int): set of bipartitions
+    """
+    all_taxa = (1 << len(taxon_bits)) - 1
+    clades = dict()
+    bipartitions = set()
+    for node in tree.traverse("postorder"):
+        if node.is_leaf():
+            clade = taxon_bits.get(node.name, 0)
+        else:
+            clade = 0
+            for child in node.children:
+                clade |= clades[child]
+        clades[node] = clade
+        bipartitions.add(clade ^ all_taxa if clade & 1 else clade)
+    # without any taxa every node results in the same empty bipartition
+    if not taxon_bits:
+        bipartitions.discard(0)
+    return bipartitions
+
+def compare_bipartitions(original_tree, generated_tree):
+    """
+    Given two ete3 trees calculates the unrooted robinson foulds distance over their common taxa by encoding each 
+    bipartition as a bitmask. Returns the same values as ete3's original_tree.compare(generated_tree, unrooted=True) 
+    i.e. the generated tree is the reference tree:\n
+    rf: robinson foulds distance, "NA" if max_rf is 0\n
+    max_rf: maximum robinson foulds distance\n
+    ref_edges_in_source: ratio of valid reference edges that are found in the original tree, "NA" if there are none\n
+    ref_edges: valid edges of the reference tree\n
+    common_edges: valid edges found in both trees\n
+    Bipartitions don't depend on where a tree is rooted, so neither tree has to be rerooted (e.g. at its midpoint) 
+    before comparing them.
+
+    Args:
+        original_tree (Tree): ete3 tree of the original newick
+        generated_tree (Tree): ete3 tree of the generated newick
+
+    Raises:
+        ValueError: if a common taxon appears more than once in one of the trees
+
+    Returns:
+        dict: dict with comparisons
+    """
+    original_taxa = original_tree.get_leaf_names()
+    generated_taxa = generated_tree.get_leaf_names()
+    common_taxa = set(original_taxa) & set(generated_taxa)
+    if sum(taxon in common_taxa for taxon in original_taxa) > len(common_taxa):
+        raise ValueError("Duplicated taxa found in original tree.")
+    if sum(taxon in common_taxa for taxon in generated_taxa) > len(common_taxa):
+        raise ValueError("Duplicated taxa found in generated tree.")
+    taxon_bits = {taxon: 1 << index for index, taxon in enumerate(sorted(common_taxa))}
+    all_taxa = (1 << len(taxon_bits)) - 1
+    original_edges = get_bipartitions(original_tree, taxon_bits)
+    generated_edges = get_bipartitions(generated_tree, taxon_bits)
+    rf = len(original_edges ^ generated_edges)
+    # count the taxa on both sides of every distinct bipartition only once
+    # first count is the side without the smallest taxon, second count the side with it
+    side_sizes = {edge: (edge.bit_count(), (edge ^ all_taxa).bit_count()) for edge in original_edges | generated_edges}
+    # only bipartitions with at least two taxa on both sides can differ between trees
+    max_rf = sum(
+        1 for edges in (original_edges, generated_edges) for edge in edges if min(side_sizes[edge]) > 1
+    )
+    # valid edges have at least two taxa on the side with the smallest taxon and at least one taxon on the other side 
+    if common_taxa and original_edges and generated_edges:
+        ref_edges = {edge for edge in generated_edges if side_sizes[edge][1] > 1 and side_sizes[edge][0] > 0}
+        source_edges = {edge for edge in original_edges if side_sizes[edge][1] > 1 and side_sizes[edge][0] > 0}
+    else:
+        ref_edges = set()
+        source_edges = set()
+    common_edges = ref_edges & source_edges
+    return {
+        "rf": float(rf) if max_rf else "NA",
+        "max_rf": float(max_rf),
+        "ref_edges_in_source": len(common_edges)/len(ref_edges) if ref_edges else "NA",
+        "ref_edges": ref_edges,
+        "common_edges": common_edges,
+    }
 
 class Comparison_Job():
     def __init__(
@@ -138,66 +353,115 @@ class Comparison_Job():
         self.generated_newick = generated_newick
         self.format_original = format_original
         self.format_generated = format_generated
+
+    @cached_property
+    def original_taxa(self):
+        """
+        Taxa of the original newick, parsed once per job.
+        """
+        return ut.get_taxa(self.original_newick)
+
+    @cached_property
+    def generated_taxa(self):
+        """
+        Taxa of the generated newick, parsed once per job.
+        """
+        return ut.get_taxa(self.generated_newick)
+
+    @cached_property
+    def taxon_pairing(self):
+        """
+        Greedily assigned original/generated taxon pairs of both newicks and their edit distances. The pairs are only 
+        computed once and reused by compare_taxa, compare_topology and compare_distances.
+
+        Returns:
+            tuple(dict, dict): see get_taxon_pairs_greedy
+        """
+        return get_taxon_pairs_greedy(self.original_taxa, self.generated_taxa)
         
-    def get_tsv_header(self, info_header):
+    @cached_property
+    def original_tree(self):
+        """
+        ete3 tree of the original newick, parsed once per job. The newick format is known already so it is passed on 
+        to ete3 (0 i.e. ete3's flexible format if it wasn't set).
+        """
+        return Tree(self.original_newick, format=self.format_original if self.format_original is not None else 0)
+
+    @cached_property
+    def generated_tree(self):
+        """
+        ete3 tree of the generated newick after its taxa were renamed to their paired original taxa, parsed once per 
+        job.
+        """
+        taxa_pairs, _ = self.taxon_pairing
+        return Tree(
+            rename_taxa(self.generated_newick, taxa_pairs), 
+            format=self.format_generated if self.format_generated is not None else 0
+        )
+
+    def run_comparisons(self):
+        """
+        Runs the comparisons that fit the formats of both newicks. Topology-only newicks (format 100) aren't compared 
+        yet.
+
+        Returns:
+            tuple(dict, dict, dict): taxa, distance and topology comparison (None if they weren't calculated)
+        """
+        if self.format_original == 100 or self.format_generated == 100:
+            # TODO add comparison for topology-only trees
+            return None, None, None
+        return self.compare_taxa(), self.compare_distances(), self.compare_topology()
+
+    @staticmethod
+    def get_tsv_header(info_header):
         """
         Function that returns the tsv header
 
         Returns:
             str: .tsv header
         """
-        # taxa comparison
-        tsv_header = "newick1\tnewick2\tformat1\tformat2\tcount_taxa1\tcount_taxa2\tcorrect_taxa_ratio\t"
-        tsv_header+="count_equal_length\tcount_unequal_length\tmean_ham_dist\tmean_ham_ratio\tmean_edit_dist\t"
-        tsv_header+="mean_edit_dist_total\tmean_edit_ratio\tmean_edit_ratio_total\t"
-        # distance comparison
-        tsv_header+="mean_abs_diff_leaf_dists\tmedian_abs_diff_leaf_dists\tmean_neg_diff_leaf_dists\t"
-        tsv_header+="median_neg_diff_leaf_dists\tmean_pos_diff_leaf_dists\t"
-        tsv_header+="median_pos_diff_leaf_dists\tmean_pairwise_dist_diff\tmedian_pairwise_dist_diff\t"
-        # topology comparison
-        tsv_header+="rf_dist\tmax_rf_dist\trf_ratio\tcount_orig_edges\tref_edges_in_source\tcount_missing_edges\t"
-        tsv_header+="count_common_edges\tcorrect_edge_ratio\t"
-        # tsv_header+="treeko_dist\t" # TODO treeko dist always NA
-        tsv_header+="count_multifurcations_original\t"
-        tsv_header+="count_multifurcations_generated\t"
-        if info_header:
-            tsv_header += info_header
+        tsv_header = [
+            "newick1", "newick2", "format1", "format2",
+            # taxa comparison
+            "count_taxa1", "count_taxa2", "correct_taxa_ratio", "count_equal_length", "count_unequal_length", 
+            "mean_ham_dist", "mean_ham_ratio", "mean_edit_dist", "mean_edit_dist_total", "mean_edit_ratio", 
+            "mean_edit_ratio_total",
+            # distance comparison
+            "mean_abs_diff_leaf_dists", "median_abs_diff_leaf_dists", "mean_neg_diff_leaf_dists", 
+            "median_neg_diff_leaf_dists", "mean_pos_diff_leaf_dists", "median_pos_diff_leaf_dists", 
+            "mean_pairwise_dist_diff", "median_pairwise_dist_diff",
+            # topology comparison
+            "rf_dist", "max_rf_dist", "rf_ratio", "count_orig_edges", "ref_edges_in_source", "count_missing_edges", 
+            "count_common_edges", "correct_edge_ratio", 
+            # "treeko_dist", # TODO treeko dist always NA
+            "count_multifurcations_original", "count_multifurcations_generated",
+        ]
         # make sure there is only one newline at the end of the header
-        tsv_header = tsv_header.rstrip("\n") + "\n"
-        return tsv_header
+        tsv_header.append(info_header.rstrip("\n") if info_header else "")
+        return "\t".join(tsv_header) + "\n"
 
     def get_tsv_entry(self, param_entry, taxa_comp, dist_comp, topo_comp):
-        tsv_entry = f"{get_filename(self.original_newick_path)}\t{get_filename(self.generated_newick_path)}\t"
-        tsv_entry+=f"{self.format_original}\t{self.format_generated}\t"
-        if taxa_comp:
-            tsv_entry+=f"{taxa_comp['taxa_count_original']}\t{taxa_comp['taxa_count_generated']}\t"
-            tsv_entry+=f"{taxa_comp['correct_taxa_ratio']}\t{taxa_comp['count_equal_length']}\t{taxa_comp['count_unequal_length']}\t"
-            tsv_entry+=f"{taxa_comp['mean_hamming_distance']}\t{taxa_comp['mean_hamming_distance_ratio']}\t"
-            tsv_entry+=f"{taxa_comp['mean_edit_distance']}\t{taxa_comp['mean_edit_distance_total']}\t{taxa_comp['mean_edit_ratio']}\t"
-            tsv_entry+=f"{taxa_comp['mean_edit_ratio_total']}\t"
-        else:
-            tsv_entry+="None\tNone\tNone\tNone\tNone\tNone\tNone\tNone\tNone\tNone\tNone\t"
-        if dist_comp:
-            tsv_entry+=f"{dist_comp['mean_abs_diff']}\t{dist_comp['median_abs_diff']}\t"
-            tsv_entry+=f"{dist_comp['mean_neg_diff']}\t{dist_comp['median_neg_diff']}\t"
-            tsv_entry+=f"{dist_comp['mean_pos_diff']}\t{dist_comp['median_pos_diff']}\t"
-            tsv_entry+=f"{dist_comp['mean_pairwise_diff']}\t{dist_comp['median_pairwise_diff']}\t"
-        else:
-            tsv_entry+="None\tNone\tNone\tNone\tNone\tNone\tNone\tNone\tNone\tNone\tNone\t"
-        if topo_comp:
-            tsv_entry+=f"{topo_comp['rf']}\t{topo_comp['max_rf']}\t{topo_comp['rf_ratio']}\t"
-            tsv_entry+=f"{topo_comp['count_original_edges']}\t{topo_comp['ref_edges_in_source']}\t"
-            tsv_entry+=f"{topo_comp['count_missing_edges']}\t{topo_comp['count_common_edges']}\t"
-            tsv_entry+=f"{topo_comp['correct_edges_ratio']}\t"
-            # tsv_entry+=f"{topo_comp["treeko_dist"]}\t" # TODO treeko dist always NA
-            tsv_entry+=f"{topo_comp['count_multifurcations_original']}\t{topo_comp['count_multifurcations_original']}\t"
-        else:
-            tsv_entry+="None\tNone\tNone\tNone\tNone\tNone\tNone\tNone\t"
-        if param_entry:
-            tsv_entry+=param_entry
+        """
+        Function that returns the tsv entry. Comparisons that weren't calculated are filled with None.
+
+        Returns:
+            str: .tsv entry
+        """
+        tsv_entry = [
+            get_filename(self.original_newick_path), 
+            get_filename(self.generated_newick_path),
+            str(self.format_original), 
+            str(self.format_generated),
+        ]
+        for comp, keys in ((taxa_comp, TAXA_COMP_KEYS), (dist_comp, DIST_COMP_KEYS), (topo_comp, TOPO_COMP_KEYS)):
+            if comp:
+                # keys missing from a comparison are written as None like a missing comparison
+                tsv_entry.extend(str(comp.get(key)) for key in keys)
+            else:
+                tsv_entry.extend("None" for _ in keys)
         # make sure there is only one newline at the end of the entry
-        tsv_entry = tsv_entry.rstrip("\n") + "\n"
-        return tsv_entry
+        tsv_entry.append(param_entry.rstrip("\n") if param_entry else "")
+        return "\t".join(tsv_entry) + "\n"
         
     def compare_taxa(self):
         """
@@ -212,46 +476,57 @@ class Comparison_Job():
         """
         # dictionary for the comparison of taxa
         taxa_dict = dict()
-        original_taxa = ut.get_taxa(self.original_newick)
-        generated_taxa = ut.get_taxa(self.generated_newick)
+        original_taxa = self.original_taxa
+        generated_taxa = self.generated_taxa
         # count taxa in both newicks
         original_taxa_count = len(original_taxa)
         generated_taxa_count = len(generated_taxa)
         taxa_dict["taxa_count_original"] = original_taxa_count
         taxa_dict["taxa_count_generated"] = generated_taxa_count
-        # percentage of correct taxa, average hamming distance, average levenshtein distance
+        taxon_pairs, pair_distances = self.taxon_pairing
+        # percentage of correct taxa, count number of taxa with equal length (implies substitutions), unequal length 
+        # (implies insertions/deletions)
         match_counter = 0
-        taxon_pairs = get_taxon_pairs_greedy(original_taxa, generated_taxa)
-        for original, generated in taxon_pairs.items():
-            if original == generated:
-                match_counter += 1
-        taxa_dict["correct_taxa_ratio"] = round(match_counter/len(original_taxa), 4) 
-        # count number of taxa with equal length (implies substitutions), unequal length (implies insertions/deletions)
         equal_length_counter = 0
         unequal_length_counter = 0
         # save which original taxa dont have a matching generated taxon
         mismatches = []
         # calculate hamming distance and ratio over all taxa pairs, taxa pairs that cant be compared are maximally 
-        # "punished"
+        # "punished" i.e. ratio 0.0
         accu_hamming_distances = 0
         accu_hamming_ratios = 0
+        # accumulate edit distances and ratios, reusing the edit distances computed while pairing the taxa
+        accu_edit_distances = 0
+        accu_edit_ratios = 0
+        # aggregate all statistics in a single pass over the pairs
         for original, generated in taxon_pairs.items():
-            if generated: 
-                if len(original) == len(generated):
-                    hdist = hamming_distance(original, generated)
-                    accu_hamming_distances += hdist
-                    accu_hamming_ratios += 1 - (hdist/len(original))
-                    equal_length_counter += 1
-                else:
-                    unequal_length_counter += 1
-                    # pairs that dont have matching lengths get max hamming distance (length of original newick)
-                    accu_hamming_ratios += 0.0
-                    accu_hamming_distances += len(original)
-            else:
-                # original taxon without matching generated one also gets max hamming distance
-                accu_hamming_ratios += 0.0
+            edit_distance, max_length = pair_distances[original]
+            accu_edit_distances += edit_distance
+            # edit distance ratio = 1 - edit distance/max length => totally different strings get 0.00 
+            accu_edit_ratios += 1 - (edit_distance/max_length)
+            if not generated:
+                # original taxon without matching generated one gets max hamming distance
                 accu_hamming_distances += len(original)
                 mismatches.append(original)
+                continue
+            if original == generated:
+                # correct taxa have hamming distance 0 and ratio 1, no need to compare them
+                match_counter += 1
+                accu_hamming_ratios += 1
+                equal_length_counter += 1
+                continue
+            if len(original) == len(generated):
+                hdist = hamming_distance(original, generated)
+                accu_hamming_distances += hdist
+                accu_hamming_ratios += 1 - (hdist/len(original))
+                equal_length_counter += 1
+            else:
+                unequal_length_counter += 1
+                # pairs that dont have matching lengths get max hamming distance (length of original newick)
+                accu_hamming_distances += len(original)
+        count_pairs = len(taxon_pairs)
+        count_matched_pairs = count_pairs - len(mismatches)
+        taxa_dict["correct_taxa_ratio"] = round(match_counter/original_taxa_count, 4) 
         # save counts of matching length, mismatchingl length and taxon mismatches/missing taxa
         taxa_dict["count_equal_length"] = equal_length_counter
         taxa_dict["count_unequal_length"] = unequal_length_counter
@@ -259,23 +534,15 @@ class Comparison_Job():
         # save mean hamming distance and ratio
         taxa_dict["mean_hamming_distance"] = round(accu_hamming_distances/original_taxa_count, 4)
         taxa_dict["mean_hamming_distance_ratio"] = round(accu_hamming_ratios/original_taxa_count, 4)
-        # calculate average edit distance and ratio for all taxa pairs
-        accu_edit_distances = 0
-        accu_edit_ratios = 0
-        for original, generated in taxon_pairs.items():
-            edit_distance = nltk.edit_distance(original, generated, substitution_cost=1, transpositions=False)
-            accu_edit_distances += edit_distance
-            # edit distance ratio = 1 - edit distance/max length => totally different strings get 0.00 
-            accu_edit_ratios += 1 - (edit_distance/max(len(original), len(generated)))
         # mean distance calculated only over pairs where the generated taxon isnt "" 
         # => should generally be higher than mean_distance_total
-        taxa_dict["mean_edit_distance"] = round(accu_edit_distances/len(taxon_pairs), 4)
+        taxa_dict["mean_edit_distance"] = round(accu_edit_distances/count_pairs, 4)
         # mean distance calculated over all pairs (even those where the generated taxon is "" => max distance)
         # => should generally be lower than mean_edit_distance
-        taxa_dict["mean_edit_distance_total"] = round(accu_edit_distances/(len(taxon_pairs)- len(mismatches)), 4)
+        taxa_dict["mean_edit_distance_total"] = round(accu_edit_distances/count_matched_pairs, 4)
         # also calculate a ratio over pairs with generated newick and over all pairs
-        taxa_dict["mean_edit_ratio"] = round(accu_edit_ratios/(len(taxon_pairs)- len(mismatches)), 4)
-        taxa_dict["mean_edit_ratio_total"] = round(accu_edit_ratios/len(taxon_pairs), 4)
+        taxa_dict["mean_edit_ratio"] = round(accu_edit_ratios/count_matched_pairs, 4)
+        taxa_dict["mean_edit_ratio_total"] = round(accu_edit_ratios/count_pairs, 4)
         return taxa_dict  
 
     def compare_topology(self):
@@ -289,20 +556,13 @@ class Comparison_Job():
             original (str): original newick
             generated (str): generated newick
         """
-        original = self.original_newick
-        generated = self.generated_newick
         # TODO add optimal pairing for edge cases like taxon1, taxon2
-        taxa_pairs = get_taxon_pairs_greedy(ut.get_taxa(original),ut.get_taxa(generated))
-        # correct spelling mistakes by AI
-        for original_taxon, generated_taxon in taxa_pairs.items():
-            generated.replace(generated_taxon, original_taxon)
-        original_tree = Tree(original)
-        generated_tree = Tree(generated)
-        original = original_tree.write()
-        generated = generated_tree.write()
+        # generated tree has the spelling mistakes by AI corrected
+        original_tree = self.original_tree
+        generated_tree = self.generated_tree
         # dictionary for the comparison of taxa
         topo_dict = dict()
-        comp_dict = original_tree.compare(generated_tree, unrooted=True)
+        comp_dict = compare_bipartitions(original_tree, generated_tree)
         topo_dict["rf"] = comp_dict["rf"]
         topo_dict["max_rf"] = comp_dict["max_rf"]
         # modified normalized rf distance = 1 - rf / max_rf 
@@ -313,8 +573,8 @@ class Comparison_Job():
             topo_dict["rf_ratio"] = None 
         # how many edges in the original newick are found in the generated newick 
         topo_dict["ref_edges_in_source"] = comp_dict["ref_edges_in_source"]
-        count_original_edges = len(list(comp_dict["ref_edges"]))
-        count_common_edges = len(list(comp_dict["common_edges"]))
+        count_original_edges = len(comp_dict["ref_edges"])
+        count_common_edges = len(comp_dict["common_edges"])
         count_missing_edges = count_original_edges - count_common_edges
         topo_dict["count_original_edges"] = count_original_edges
         topo_dict["count_missing_edges"] = count_missing_edges
@@ -326,8 +586,8 @@ class Comparison_Job():
             topo_dict["correct_edges_ratio"] = 0
         # topo_dict["treeko_dist"] = round(float(comp_dict["treeko_dist"]),4) # TODO treeKO dist is NA
         # compare multifurcations
-        topo_dict["count_multifurcations_original"] = ut.count_multifurcations(original)
-        topo_dict["count_multifurcations_generated"] = ut.count_multifurcations(generated)
+        topo_dict["count_multifurcations_original"] = count_multifurcations(original_tree)
+        topo_dict["count_multifurcations_generated"] = count_multifurcations(generated_tree)
         return topo_dict
     
     def compare_distances(self):    
@@ -354,85 +614,166 @@ class Comparison_Job():
             dict: dict with comparisons
         """
         dist_dict = dict()
-        # get newicks
-        original = self.original_newick
-        generated = self.generated_newick
-        # get taxa pairs
-        taxa_pairs = get_taxon_pairs_greedy(ut.get_taxa(original),ut.get_taxa(self.generated_newick))
-        for original_taxon, generated_taxon in taxa_pairs.items():
-            generated.replace(generated_taxon, original_taxon)
-        # create trees with updated taxa
-        original_tree = Tree(original)
-        generated_tree = Tree(generated)
+        # trees with the taxa of the generated tree renamed to their paired original taxa
+        original_tree = self.original_tree
+        generated_tree = self.generated_tree
         # save every leaf-parent distance difference
         leaf_parent_dist_diffs = []
         # get all common leaves
         common_leaves = set(original_tree.get_leaf_names()) & set(generated_tree.get_leaf_names())
-        # iterate over common leaf nodes and compute the difference of original leaf branch length and generated one
+        # map each name to the branch length of the first node carrying it (same node search_nodes would return)
+        orig_dist_by_name = dict()
+        for node in original_tree.traverse():
+            orig_dist_by_name.setdefault(node.name, node.dist)
+        gen_dist_by_name = dict()
+        for node in generated_tree.traverse():
+            gen_dist_by_name.setdefault(node.name, node.dist)
+        # iterate over common leaves and compute the difference of original leaf branch length and generated one
         for leaf in common_leaves:
-            # original leaf
-            orig_leaf = original_tree.search_nodes(name=leaf)[0]
-            # generated leaf
-            gen_leaf = generated_tree.search_nodes(name=leaf)[0]
-            # check if generated newick contains the current leaf
-            leaf_parent_dist_diffs.append(orig_leaf.dist - gen_leaf.dist) 
+            leaf_parent_dist_diffs.append(orig_dist_by_name[leaf] - gen_dist_by_name[leaf]) 
+        leaf_parent_dist_diffs = np.asarray(leaf_parent_dist_diffs, dtype=np.float64)
         # calculate mean and median over absolute differences
-        abs_leaf_parent_dist_diffs = list(map(abs,leaf_parent_dist_diffs))
-        dist_dict["mean_abs_diff"] = round(mean(abs_leaf_parent_dist_diffs),4)
-        dist_dict["median_abs_diff"] = round(median(abs_leaf_parent_dist_diffs),4)
+        abs_leaf_parent_dist_diffs = np.abs(leaf_parent_dist_diffs)
+        if abs_leaf_parent_dist_diffs.size:
+            dist_dict["mean_abs_diff"] = round(float(np.mean(abs_leaf_parent_dist_diffs)),4)
+            dist_dict["median_abs_diff"] = round(float(np.median(abs_leaf_parent_dist_diffs)),4)
+        else:
+            # without common leaves there is nothing to compare
+            dist_dict["mean_abs_diff"] = None
+            dist_dict["median_abs_diff"] = None
         # calculate mean diff over negative values i.e. generated edge is longer than original one
-        neg_leaf_parent_dist_diffs = [diff for diff in leaf_parent_dist_diffs if diff < 0]
-        if neg_leaf_parent_dist_diffs:
-            dist_dict["mean_neg_diff"] = round(mean(neg_leaf_parent_dist_diffs),4) 
-            dist_dict["median_neg_diff"] = round(median(neg_leaf_parent_dist_diffs),4) 
+        neg_leaf_parent_dist_diffs = leaf_parent_dist_diffs[leaf_parent_dist_diffs < 0]
+        if neg_leaf_parent_dist_diffs.size:
+            dist_dict["mean_neg_diff"] = round(float(np.mean(neg_leaf_parent_dist_diffs)),4) 
+            dist_dict["median_neg_diff"] = round(float(np.median(neg_leaf_parent_dist_diffs)),4) 
         else:
             # if there are 0 negative differences i.e. no edge was made longer by the model, set mean/median to 0
             dist_dict["mean_neg_diff"] = 0 
             dist_dict["median_neg_diff"] = 0
         # calculate mean diff over positive values i.e. generated edge is shorter than original one
-        pos_leaf_parent_dist_diffs = [diff for diff in leaf_parent_dist_diffs if diff > 0]
-        if pos_leaf_parent_dist_diffs:
-            dist_dict["mean_pos_diff"] = round(mean(pos_leaf_parent_dist_diffs),4)
-            dist_dict["median_pos_diff"] = round(median(pos_leaf_parent_dist_diffs),4)
+        pos_leaf_parent_dist_diffs = leaf_parent_dist_diffs[leaf_parent_dist_diffs > 0]
+        if pos_leaf_parent_dist_diffs.size:
+            dist_dict["mean_pos_diff"] = round(float(np.mean(pos_leaf_parent_dist_diffs)),4)
+            dist_dict["median_pos_diff"] = round(float(np.median(pos_leaf_parent_dist_diffs)),4)
         else:
             # if no edge was shortened by the model, set mean/median to 0
             dist_dict["mean_pos_diff"] = 0
             dist_dict["median_pos_diff"] = 0
-        # list for pairwise distances
-        abs_pairwise_dist_diffs = []
-        # iterate over common leaf pairs and get the absolute difference in pairwise distances
-        for leaf1, leaf2 in combinations(common_leaves, 2):
-            # duplicated leaves cause crash in ete3s compare function => quick solution is to skip them
-            try:
-                original_dist = original_tree.get_distance(leaf1, leaf2)
-            except Exception as e:
-                logging.warning(f"Can't compare {leaf1} and {leaf2} in original tree: {e}")
-                # skip over leaves that are ambiguous
-                continue
-            try:
-                generated_dist = generated_tree.get_distance(leaf1, leaf2)
-            except Exception as e:
-                logging.warning(f"Can't compare {leaf1} and {leaf2} in generated tree: {e}")
-                # skip over leaves that are ambiguous
-                continue
-            abs_pairwise_dist_diffs.append(abs(original_dist-generated_dist))
-        if abs_pairwise_dist_diffs:
-            dist_dict["mean_pairwise_diff"] = round(mean(abs_pairwise_dist_diffs),4)
-            dist_dict["median_pairwise_diff"] = round(median(abs_pairwise_dist_diffs),4)
+        # names of multiple nodes are ambiguous and leaves with such names can't be compared => skip them
+        ambiguous_taxa = set()
+        for tree, tree_type in ((original_tree, "original"), (generated_tree, "generated")):
+            name_counts = Counter(node.name for node in tree.traverse())
+            for leaf in common_leaves:
+                if name_counts[leaf] > 1:
+                    # lazy formatting, the message is only built if the warning is emitted
+                    console_logger.warning("Can't compare %s in %s tree: Ambiguous node name: %s", leaf, tree_type, leaf)
+                    ambiguous_taxa.add(leaf)
+        comparable_taxa = sorted(common_leaves - ambiguous_taxa)
+        # absolute difference in pairwise distances over all pairs of comparable leaves
+        original_dists = get_pairwise_distances(original_tree, comparable_taxa)
+        generated_dists = get_pairwise_distances(generated_tree, comparable_taxa)
+        upper_triangle = np.triu_indices(len(comparable_taxa), k=1)
+        abs_pairwise_dist_diffs = np.abs(original_dists - generated_dists)[upper_triangle]
+        if abs_pairwise_dist_diffs.size:
+            dist_dict["mean_pairwise_diff"] = round(float(np.mean(abs_pairwise_dist_diffs)),4)
+            dist_dict["median_pairwise_diff"] = round(float(np.median(abs_pairwise_dist_diffs)),4)
         else: 
             dist_dict["mean_pairwise_diff"] = None
             dist_dict["median_pairwise_diff"] = None
         return dist_dict
 
+def create_comparison_job(path_original_newick, path_generated_newick):
+    """
+    Given the paths of an original and a generated newick reads both newicks, determines their formats and returns the 
+    Comparison_Job comparing them.
+
+    Args:
+        path_original_newick (str): path of the .nwk of the original newick
+        path_generated_newick (str): path of the .nwk of the generated newick
+
+    Returns:
+        Comparison_Job: job comparing both newicks
+    """
+    original_newick, format_original = get_newick_from_file(path_original_newick)
+    generated_newick, format_generated = get_newick_from_file(path_generated_newick)
+    return Comparison_Job(
+        original_newick_path=path_original_newick,
+        generated_newick_path=path_generated_newick,
+        original_newick=original_newick,
+        generated_newick=generated_newick,
+        format_original=format_original,
+        format_generated=format_generated,
+    )
+
+def get_comparison_entry(comparison_job, info_entry=None):
+    """
+    Runs the comparisons of a job and returns its .tsv entry. Module level function so it can be sent to worker 
+    processes.
+
+    Args:
+        comparison_job (Comparison_Job): job whose newicks are compared
+        info_entry (str, optional): entry of the parameter .tsv appended to the comparison entry. Defaults to None.
+
+    Returns:
+        str: .tsv entry
+    """
+    taxa_comp_dict, dist_comp_dict, topo_comp_dict = comparison_job.run_comparisons()
+    return comparison_job.get_tsv_entry(
+        info_entry, taxa_comp=taxa_comp_dict, dist_comp=dist_comp_dict, topo_comp=topo_comp_dict
+    )
+
+def get_comparison_entries(comparison_jobs, info_entry=None, workers=1):
+    """
+    Yields the .tsv entries of the given jobs in their order. The jobs don't share any state, so with more than one 
+    worker they are distributed over a process pool.
+
+    Args:
+        comparison_jobs (list[Comparison_Job]): jobs whose newicks are compared
+        info_entry (str, optional): entry of the parameter .tsv appended to every comparison entry. Defaults to None.
+        workers (int, optional): amount of worker processes. Defaults to 1 i.e. no process pool.
+
+    Yields:
+        str: .tsv entry
+    """
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(get_comparison_entry, comparison_jobs, repeat(info_entry), chunksize=16)
+    else:
+        for comparison_job in comparison_jobs:
+            yield get_comparison_entry(comparison_job, info_entry)
+
+def run_batch(comparison_jobs, outfile_path, info_header=None, info_entry=None, workers=1):
+    """
+    Runs the comparisons of every job and appends their .tsv entries to the .tsv at outfile_path. The file is opened 
+    only once for all jobs and the header is only written if the file doesn't exist yet.
+
+    Args:
+        comparison_jobs (list[Comparison_Job]): jobs whose newicks are compared
+        outfile_path (str): path of the .tsv
+        info_header (str, optional): header of the parameter .tsv appended to the comparison header. Defaults to None.
+        info_entry (str, optional): entry of the parameter .tsv appended to every comparison entry. Defaults to None.
+        workers (int, optional): amount of worker processes. Defaults to 1 i.e. no process pool.
+    """
+    # the header is only written if the file doesn't exist yet, header and entries share one file handle
+    write_header = not os.path.exists(outfile_path)
+    if write_header:
+        console_logger.info("File doesn't exist. Creating .tsv with header.")
+    else: 
+        console_logger.info("File exists. Writing .tsv entry directly.")
+    with open(outfile_path, "a", buffering=1<<20) as tsv_file:
+        if write_header:
+            tsv_file.write(Comparison_Job.get_tsv_header(info_header))
+        tsv_file.writelines(get_comparison_entries(comparison_jobs, info_entry=info_entry, workers=workers))
+
 def main():
     argument_parser = argparse.ArgumentParser(
         description="Module for comparing two newicks e.g. an original newick of a dataset and an AI-generated newick.",
     )
-    argument_parser.add_argument("-n", "--original_newick", required=True, type=str,
-                                 help="Path to the .nwk of the original Newick.")
-    argument_parser.add_argument("-g", "--generated_newick", required=True, type=str,
+    argument_parser.add_argument("-n", "--original_newick", required=False, type=str,
+                                 help="Path to the .nwk of the original Newick. Required unless --pairs_file is given.")
+    argument_parser.add_argument("-g", "--generated_newick", required=False, type=str,
                                  help="Path to the .nwk of the AI-generated Newick or any newick that should be "
-                                 "compared to the original one.")
+                                 "compared to the original one. Required unless --pairs_file is given.")
     argument_parser.add_argument(
         "-o", 
         "--outfile", 
@@ -456,6 +797,20 @@ def main():
         "for the complete performance analysis in one file. This appends the given .tsv's header to the comparison "
         "header and adds the first entry of the parameter .tsv to the comparison entry."
     )
+    argument_parser.add_argument(
+        "--pairs_file",
+        required=False,
+        type=str,
+        help="Path to a file with one pair of newick paths per line, separated by a tab (original path first). Every "
+        "pair is compared and gets its own .tsv entry. Replaces -n and -g when comparing many newick pairs at once."
+    )
+    argument_parser.add_argument(
+        "-w",
+        "--workers",
+        required=False,
+        type=int,
+        help="Amount of worker processes used to compare the pairs of --pairs_file. Defaults to the number of CPUs."
+    )
     ############### ARGUMENTS ###############
     args = argument_parser.parse_args()
     path_original_newick = args.original_newick
@@ -463,6 +818,11 @@ def main():
     outfile_path = args.outfile
     quiet = args.quiet
     params_path = args.params
+    pairs_path = args.pairs_file
+    # a single pair is compared in the main process
+    workers = (args.workers or os.cpu_count()) if pairs_path else 1
+    if not pairs_path and not (path_original_newick and path_generated_newick):
+        argument_parser.error("Either -n and -g or --pairs_file are required.")
     ########## CONFIGURE LOGGER ##########
     logFormatter = logging.Formatter("%(asctime)s [%(levelname)-5.5s]  %(message)s")
     stream_handler = logging.StreamHandler(sys.stdout)
@@ -473,41 +833,44 @@ def main():
     else:
         console_logger.setLevel(logging.INFO)
     console_logger.info("Starting newick_comparison")
-    ########## CREATE COMPARISON_JOB OBJECT ##########
-    # get newicks from their files
-    original_newick = get_newick_from_file(path_original_newick)
-    generated_newick = get_newick_from_file(path_generated_newick)
-    # check if newicks are valid and set their format
-    format_original = ut.get_newick_format(original_newick)
-    format_generated = ut.get_newick_format(generated_newick)
-    console_logger.info(f"Newick 1: {original_newick}")
-    console_logger.info(f"Newick 2: {generated_newick}")
-    # set flags, if one of the two newicks e.g. doesnt have distances, their distances wont be compared
-    if format_original == 100 or format_generated == 100:
-        topo_only = True
+    ########## CREATE COMPARISON_JOB OBJECTS ##########
+    if pairs_path:
+        if not os.path.isfile(pairs_path):
+            raise FileNotFoundError(f"--pairs_file: File does not exist: {pairs_path}")
+        # every line holds the path of an original and of a generated newick separated by a tab
+        comparison_jobs = []
+        with open(pairs_path, "r") as pairs_file:
+            for line in pairs_file:
+                if not line.strip():
+                    continue
+                path_original_newick, path_generated_newick = line.rstrip("\n").split("\t")
+                comparison_jobs.append(create_comparison_job(path_original_newick, path_generated_newick))
+        console_logger.info("Comparing %s newick pairs using %s worker processes.", len(comparison_jobs), workers)
     else:
-        topo_only = False
-    if format_original == 9 or format_generated == 9:
-        taxa_only = True
-    else: 
-        taxa_only = False
-    # create job object
-    comparison_job = Comparison_Job(
-        original_newick_path=path_original_newick,
-        generated_newick_path=path_generated_newick,
-        original_newick=original_newick,
-        generated_newick=generated_newick,
-        format_original=format_original,
-        format_generated=format_generated,
-    )
+        # get newicks from their files, check if they are valid and set their format
+        comparison_job = create_comparison_job(path_original_newick, path_generated_newick)
+        comparison_jobs = [comparison_job]
+        format_original = comparison_job.format_original
+        format_generated = comparison_job.format_generated
+        console_logger.info("Newick 1: %s", comparison_job.original_newick)
+        console_logger.info("Newick 2: %s", comparison_job.generated_newick)
+        # set flags, if one of the two newicks e.g. doesnt have distances, their distances wont be compared
+        if format_original == 100 or format_generated == 100:
+            topo_only = True
+        else:
+            topo_only = False
+        if format_original == 9 or format_generated == 9:
+            taxa_only = True
+        else: 
+            taxa_only = False
+        # if both newicks have different formats warn user and only compare attributes both newicks have
+        if not format_original == format_generated:
+            console_logger.warning(f"Newicks have different formats. Format original newick: {format_original}. "
+                                   f"Format generated newick: {format_generated}.")
+        console_logger.info(
+            f"Comparing {'just topology' if topo_only else 'just taxa' if taxa_only else 'taxa and branch lengths'}."
+        )
     ########## CHECKS ##########
-    # if both newicks have different formats warn user and only compare attributes both newicks have
-    if not format_original == format_generated:
-        console_logger.warning(f"Newicks have different formats. Format original newick: {format_original}. Format "
-                         f"generated newick: {format_generated}.")
-    console_logger.info(
-        f"Comparing {'just topology' if topo_only else 'just taxa' if taxa_only else 'taxa and branch lengths'}."
-    )
     if outfile_path:
         if os.path.isdir(outfile_path):
             raise IsADirectoryError(f"--outfile: Expected filepath but got directory path: {outfile_path}")
@@ -524,37 +887,13 @@ def main():
         with open(params_path, "r") as tsv:
             info_header = tsv.readline()
             info_entry = tsv.readline()
-    # calculate comparisons for taxa-only pairs
-    if taxa_only:
-        taxa_comp_dict = comparison_job.compare_taxa()
-        dist_comp_dict = comparison_job.compare_distances()
-        topo_comp_dict = comparison_job.compare_topology()
-    # calculate only topology comparison
-    elif topo_only:
-        # TODO add comparison for topology-only trees
-        taxa_comp_dict = None
-        dist_comp_dict = None
-        topo_comp_dict = None
-    else:
-        taxa_comp_dict = comparison_job.compare_taxa()
-        dist_comp_dict = comparison_job.compare_distances()
-        topo_comp_dict = comparison_job.compare_topology()
-    # create tsv header and entry
-    tsv_header = comparison_job.get_tsv_header(info_header)
-    tsv_entry = comparison_job.get_tsv_entry(info_entry, taxa_comp=taxa_comp_dict,dist_comp=dist_comp_dict,topo_comp=topo_comp_dict)
     # either print the results or write them to file 
     if outfile_path:
-        if not os.path.exists(outfile_path):
-            console_logger.info("File doesn't exist. Creating .tsv with header.")
-            with open(outfile_path, "w") as tsv_file:
-                tsv_file.write(tsv_header)
-        else: 
-            console_logger.info("File exists. Writing .tsv entry directly.")
-        with open(outfile_path, "a") as tsv_file:
-            tsv_file.write(tsv_entry)
+        run_batch(comparison_jobs, outfile_path, info_header=info_header, info_entry=info_entry, workers=workers)
     else: 
-        print(tsv_header)
-        print(tsv_entry)
+        print(Comparison_Job.get_tsv_header(info_header))
+        for tsv_entry in get_comparison_entries(comparison_jobs, info_entry=info_entry, workers=workers):
+            print(tsv_entry)
     console_logger.info("Finished newick_comparison")
 # execute main method
 if __name__ == "__main__":
@@ -1,15 +1,83 @@
 # file for saving instructions for every type of request
+from types import MappingProxyType
+
 prompt = "Give me the Newick format of this phylogenetic tree."
 
-instr_correct_newick = """You are given an image of a phylogenetic tree that may have multifurcations and a string in Newick format that may have false formatting and spelling mistakes. 
+# building blocks shared by several instructions, every instruction below is composed of them once at import time
+# NOTE the composed instructions have to stay exactly the same since finetuning data was created with them
+
+# newick guidelines
+_NWK_REPLY_RULE = """- Reply with nothing but the newick, no explanation, no prefix, no suffix
+"""
+_NWK_FORMATTING_RULES = """- Dont put backticks around the newick 
+- Dont put new lines in the newick
+"""
+_SCALE_BAR_RULE = """- There is a single line with a distance in one of the corners, this is a scale bar, infer branch lengths from it
+"""
+_NWK_TAXA_RULE = """- The Newick string must include the taxon names exactly as shown in the image
+"""
+_NWK_TOPOLOGY_RULE = """- The Newick string must correspond to the topology exactly as shown in the image
+"""
+_BRANCH_LENGTH_RULE = """- The Newick string must include branch lengths exactly as shown in the image or from inferring them from the scale bar
+"""
+_ALWAYS_BRANCH_LENGTHS_RULE = """- The Newick must always include branch lengths, either from the branch labels or from inferring them from the scale bar
+"""
+
+# newick examples
+_NWK_EXAMPLES = """((<taxon1>:<branch_length1>,<taxon2>:<branch_length2>):<branch_length4>,<taxon3>:<branch_length3>);
+((A:2.37,B:1.55):4.58,((C:1.43,D:3.63):0.27,E:1.66):4.07);
+"""
+_NWK_TAXA_ONLY_EXAMPLES = """((<taxon1>,<taxon2>),<taxon3>);
+((A,B),((C,D),E));
+"""
+_NWK_TOPO_ONLY_EXAMPLE = """((,),((,),));
+"""
+_NWK_MULTIFURCATION_EXAMPLE = """((A:4.24,B:2.21,C:9.11):3.31,(D:2.22,E:1.02):1.21,((F:4.26,G:6.66):5.01,H:1.32):3.21);
+"""
+_NWK_TAXA_ONLY_MULTIFURCATION_EXAMPLE = """((A,B,C),(D,E),((F,G),H));
+"""
+_NWK_TOPO_ONLY_MULTIFURCATION_EXAMPLE = """((,,),(,),((,),));
+"""
+
+# topology guidelines
+_TOPO_RULES = """- Reply with nothing but the topology, no explanation, no prefix, no suffix 
+- Each indentation is 4 spaces
+- Each indentation level corresponds to one clade deeper in the tree's hierarchy
+- No indentation means it is the root
+- One tab of indentation means that the clade or leaf is the child of the root
+- Two tabs mean that the clade or leaf is the grandchild of the root and so on
+"""
+
+# topology examples i.e. a printed Bio.Phylo tree and the tree it corresponds to
+_TOPO_EXAMPLE = """Clade()
+    Clade(branch_length=3.54)
+        Clade(branch_length=3.42)
+            Clade(branch_length=4.88, name='Crassulaceae')
+            Clade(branch_length=3.53, name='Calycanthus_chinensis')
+        Clade(branch_length=1.8, name='Verruciconidia_persicina')
+    Clade(branch_length=3.27)
+        Clade(branch_length=0.42, name='Aquaspirillum_serpens')
+        Clade(branch_length=1.74, name='Wolbachia_pipientis')
+"""
+_TOPO_TREE_EXAMPLE = """                                _____________________ Crassulaceae
+                 ______________|
+  ______________|              |_______________ Calycanthus_chinensis
+ |              |
+_|              |_______ Verruciconidia_persicina
+ |
+ |              _ Aquaspirillum_serpens
+ |_____________|
+               |_______ Wolbachia_pipientis
+"""
+
+instr_correct_newick = f"""You are given an image of a phylogenetic tree that may have multifurcations and a string in Newick format that may have false formatting and spelling mistakes. 
 Your task is to fix errors in the string in Newick format and output a string in Newick format with valid formatting and no spelling mistakes.  
         
 Example of correct Newick format: 
 ((<taxon1>:<branch_length1>,<taxon2>:<branch_length2>):<branch_length4>,<taxon3>:<branch_length3>);
 
 Guidelines:
-- Reply with nothing but the newick, no explanation, no prefix, no suffix
-- Dont add taxa and branch lengths
+{_NWK_REPLY_RULE}- Dont add taxa and branch lengths
 - Dont put backticks around the newick and dont but new lines in the newick
 - Correct parentheses with respect to the topology of the phylogenetic tree in the given image 
 - Make sure every closing parentheses is followed by a comma expect the last closing parentheses e.g. ");"
@@ -17,138 +85,71 @@ Guidelines:
 - Make sure there aren't any unnecessary parentheses
 """
 
-instr_nwk_regular = """You are given an image of a phylogenetic tree that may have multifurcations. 
+instr_nwk_regular = f"""You are given an image of a phylogenetic tree that may have multifurcations. 
 You task is to output only the tree in valid Newick format. Preserve all taxa, all branchlengths and topology.
 In case there are no branch lengths then infer the branch lengths from the scale bar.
 
 Guidelines:
-- Reply with nothing but the newick, no explanation, no prefix, no suffix
-- There is a single line with a distance in one of the corners, this is a scale bar, infer branch lengths from it
-- Dont put backticks around the newick 
-- Dont put new lines in the newick
-- The Newick string must include the taxon names exactly as shown in the image
-- The Newick string must correspond to the topology exactly as shown in the image
-- The Newick string must include branch lengths exactly as shown in the image or from inferring them from the scale bar
-- The Newick must always include branch lengths, either from the branch labels or from inferring them from the scale bar
-
+{_NWK_REPLY_RULE}{_SCALE_BAR_RULE}{_NWK_FORMATTING_RULES}{_NWK_TAXA_RULE}{_NWK_TOPOLOGY_RULE}{_BRANCH_LENGTH_RULE}{_ALWAYS_BRANCH_LENGTHS_RULE}
 Examples:
-((<taxon1>:<branch_length1>,<taxon2>:<branch_length2>):<branch_length4>,<taxon3>:<branch_length3>);
-((A:2.37,B:1.55):4.58,((C:1.43,D:3.63):0.27,E:1.66):4.07);
-Example with multifurcations:
-((A:4.24,B:2.21,C:9.11):3.31,(D:2.22,E:1.02):1.21,((F:4.26,G:6.66):5.01,H:1.32):3.21);
-"""
+{_NWK_EXAMPLES}Example with multifurcations:
+{_NWK_MULTIFURCATION_EXAMPLE}"""
 
 
-instr_nwk_taxa_only = """You are given an image of a phylogenetic tree that may have multifurcations. 
+instr_nwk_taxa_only = f"""You are given an image of a phylogenetic tree that may have multifurcations. 
 You task is to output only the tree in valid Newick format. Preserve all taxa (if visible), all branchlengths (if visible) and topology.
 In case there are no branch lengths then infer the branch lengths from the scale bar.
 
 Guidelines:
-- Reply with nothing but the newick, no explanation, no prefix, no suffix
-- Dont put backticks around the newick 
-- Dont put new lines in the newick
-- The Newick string must include the taxon names exactly as shown in the image
-- The Newick string must correspond to the topology exactly as shown in the image
-
+{_NWK_REPLY_RULE}{_NWK_FORMATTING_RULES}{_NWK_TAXA_RULE}{_NWK_TOPOLOGY_RULE}
 Examples:
-((<taxon1>,<taxon2>),<taxon3>);
-((A,B),((C,D),E));
-
+{_NWK_TAXA_ONLY_EXAMPLES}
 Example with multifurcations:
-((A,B,C),(D,E),((F,G),H));
-"""
+{_NWK_TAXA_ONLY_MULTIFURCATION_EXAMPLE}"""
 
 
-instr_nwk_topo_only = """You are given an image of a phylogenetic tree that may have multifurcations. 
+instr_nwk_topo_only = f"""You are given an image of a phylogenetic tree that may have multifurcations. 
 You task is to output only the tree in valid Newick format. Ignore the taxa and the branch lengths, output a topology-only newick.
  
 Guidelines:
-- Reply with nothing but the newick, no explanation, no prefix, no suffix
-- Dont put backticks around the newick 
-- Dont put new lines in the newick
-- The Newick string must correspond to the topology exactly as shown in the image
-
+{_NWK_REPLY_RULE}{_NWK_FORMATTING_RULES}{_NWK_TOPOLOGY_RULE}
 Example without multifurcations:
-((,),((,),));
-Example with multifurcations:
-((,,),(,),((,),));
-"""
+{_NWK_TOPO_ONLY_EXAMPLE}Example with multifurcations:
+{_NWK_TOPO_ONLY_MULTIFURCATION_EXAMPLE}"""
 
 
-instr_nwk_all_cases = """You are given an image of a phylogenetic tree that may have multifurcations. You task is to 
+instr_nwk_all_cases = f"""You are given an image of a phylogenetic tree that may have multifurcations. You task is to 
 output only the tree in valid Newick format. Preserve all taxa (if visible), all branch
 lengths (if visible) and topology.
 In case there are no branch lengths then infer the branch lengths from the scale bar.
 
 Guidelines:
-- Reply with nothing but the newick, no explanation, no prefix, no suffix
-- There is a single line with a distance in one of the corners, this is a scale bar, infer branch lengths from it
-- Dont put backticks around the newick 
-- Dont put new lines in the newick
-- The Newick string must include the taxon names exactly as shown in the image
-- The Newick string must correspond to the topology exactly as shown in the image
-- The Newick string must include branch lengths exactly as shown in the image or from inferring them from the scale bar
-- The Newick must always include branch lengths, either from the branch labels or from inferring them from the scale bar
-- Only if there is no scale bar and no branch labels, dont include the distances e.g. ((A,B),((C,D),E));
+{_NWK_REPLY_RULE}{_SCALE_BAR_RULE}{_NWK_FORMATTING_RULES}{_NWK_TAXA_RULE}{_NWK_TOPOLOGY_RULE}{_BRANCH_LENGTH_RULE}{_ALWAYS_BRANCH_LENGTHS_RULE}- Only if there is no scale bar and no branch labels, dont include the distances e.g. ((A,B),((C,D),E));
 - Only if there are no branch labels, scale bar and no taxa output just the topology e.g. ((,),(,(,)));
 
 Examples:
 
 Example with taxa and branch lengths: 
-((<taxon1>:<branch_length1>,<taxon2>:<branch_length2>):<branch_length4>,<taxon3>:<branch_length3>);
-((A:2.37,B:1.55):4.58,((C:1.43,D:3.63):0.27,E:1.66):4.07);
-Example without branch lengths.
-((<taxon1>,<taxon2>),<taxon3>);
-((A,B),((C,D),E));
-Example without branch lengths and taxa:
-((,),((,),));
-Example with multifurcations:
-((A:4.24,B:2.21,C:9.11):3.31,(D:2.22,E:1.02):1.21,((F:4.26,G:6.66):5.01,H:1.32):3.21);
-((A,B,C),(D,E),((F,G),H));
-((,,),(,),((,),));
-"""
+{_NWK_EXAMPLES}Example without branch lengths.
+{_NWK_TAXA_ONLY_EXAMPLES}Example without branch lengths and taxa:
+{_NWK_TOPO_ONLY_EXAMPLE}Example with multifurcations:
+{_NWK_MULTIFURCATION_EXAMPLE}{_NWK_TAXA_ONLY_MULTIFURCATION_EXAMPLE}{_NWK_TOPO_ONLY_MULTIFURCATION_EXAMPLE}"""
 
 
-instr_topo_regular = """You are given an image of a phylogenetic tree. Your task is to output the topology, taxon 
+instr_topo_regular = f"""You are given an image of a phylogenetic tree. Your task is to output the topology, taxon 
 names and branch lengths in a hierarchical text format similar to that of Bio.Phylo when a Tree object is printed.
 
 Example:
-Clade()
-    Clade(branch_length=3.54)
-        Clade(branch_length=3.42)
-            Clade(branch_length=4.88, name='Crassulaceae')
-            Clade(branch_length=3.53, name='Calycanthus_chinensis')
-        Clade(branch_length=1.8, name='Verruciconidia_persicina')
-    Clade(branch_length=3.27)
-        Clade(branch_length=0.42, name='Aquaspirillum_serpens')
-        Clade(branch_length=1.74, name='Wolbachia_pipientis')
-        
+{_TOPO_EXAMPLE}        
 this corresponds to a tree like:
 
-                                _____________________ Crassulaceae
-                 ______________|
-  ______________|              |_______________ Calycanthus_chinensis
- |              |
-_|              |_______ Verruciconidia_persicina
- |
- |              _ Aquaspirillum_serpens
- |_____________|
-               |_______ Wolbachia_pipientis
-
+{_TOPO_TREE_EXAMPLE}
 Guidelines:
-- Reply with nothing but the topology, no explanation, no prefix, no suffix 
-- Each indentation is 4 spaces
-- Each indentation level corresponds to one clade deeper in the tree's hierarchy
-- No indentation means it is the root
-- One tab of indentation means that the clade or leaf is the child of the root
-- Two tabs mean that the clade or leaf is the grandchild of the root and so on
-- There is a single line with a distance in one of the corners, this is a scale bar, infer branch lengths from it
-- The topology string must include all taxon names and branch lengths
-- The Newick string must include branch lengths exactly as shown in the image or from inferring them from the scale bar
-"""
+{_TOPO_RULES}{_SCALE_BAR_RULE}- The topology string must include all taxon names and branch lengths
+{_BRANCH_LENGTH_RULE}"""
 
 
-instr_topo_taxa_only = """You are given an image of a phylogenetic tree. Your task is to output the topology and taxon 
+instr_topo_taxa_only = f"""You are given an image of a phylogenetic tree. Your task is to output the topology and taxon 
 names in a hierarchical text format similar to that of Bio.Phylo when a Tree object is printed. Ignore branch lengths.
 
 Example: 
@@ -164,28 +165,13 @@ Clade()
         
 this corresponds to a tree like:
 
-                                _____________________ Crassulaceae
-                 ______________|
-  ______________|              |_______________ Calycanthus_chinensis
- |              |
-_|              |_______ Verruciconidia_persicina
- |
- |              _ Aquaspirillum_serpens
- |_____________|
-               |_______ Wolbachia_pipientis
-
+{_TOPO_TREE_EXAMPLE}
 Guidelines:
-- Reply with nothing but the topology, no explanation, no prefix, no suffix 
-- Each indentation is 4 spaces
-- Each indentation level corresponds to one clade deeper in the tree's hierarchy
-- No indentation means it is the root
-- One tab of indentation means that the clade or leaf is the child of the root
-- Two tabs mean that the clade or leaf is the grandchild of the root and so on
-- The topology string must include all taxon names
+{_TOPO_RULES}- The topology string must include all taxon names
 """
 
 
-instr_topo_topo_only = """You are given an image of a phylogenetic tree. Your task is to output the topology in a 
+instr_topo_topo_only = f"""You are given an image of a phylogenetic tree. Your task is to output the topology in a 
 hierarchical text format similar to that of Bio.Phylo when a Tree object is printed. Ignore branch lengths and taxa
 focus on getting the topology right.
 
@@ -213,54 +199,33 @@ _|              |_______
                |_______ 
 
 Guidelines:
-- Reply with nothing but the topology, no explanation, no prefix, no suffix 
-- Each indentation is 4 spaces
-- Each indentation level corresponds to one clade deeper in the tree's hierarchy
-- No indentation means it is the root
-- One tab of indentation means that the clade or leaf is the child of the root
-- Two tabs mean that the clade or leaf is the grandchild of the root and so on
-"""
+{_TOPO_RULES}"""
+
 
-    
-instr_topo_all_cases = """You are given an image of a phylogenetic tree. Your task is to output the topology, taxon 
+instr_topo_all_cases = f"""You are given an image of a phylogenetic tree. Your task is to output the topology, taxon 
 names (if visible) and branch lengths (if visible) in a hierarchical text format similar to that of Bio.Phylo
 when a Tree object is printed.
 
 Example with taxon names and branch lengths: 
-Clade()
-    Clade(branch_length=3.54)
-        Clade(branch_length=3.42)
-            Clade(branch_length=4.88, name='Crassulaceae')
-            Clade(branch_length=3.53, name='Calycanthus_chinensis')
-        Clade(branch_length=1.8, name='Verruciconidia_persicina')
-    Clade(branch_length=3.27)
-        Clade(branch_length=0.42, name='Aquaspirillum_serpens')
-        Clade(branch_length=1.74, name='Wolbachia_pipientis')
-        
+{_TOPO_EXAMPLE}        
 this corresponds to a tree like:
 
-                                _____________________ Crassulaceae
-                 ______________|
-  ______________|              |_______________ Calycanthus_chinensis
- |              |
-_|              |_______ Verruciconidia_persicina
- |
- |              _ Aquaspirillum_serpens
- |_____________|
-               |_______ Wolbachia_pipientis
-
+{_TOPO_TREE_EXAMPLE}
 Guidelines:
-- Reply with nothing but the topology, no explanation, no prefix, no suffix 
-- Each indentation is 4 spaces
-- Each indentation level corresponds to one clade deeper in the tree's hierarchy
-- No indentation means it is the root
-- One tab of indentation means that the clade or leaf is the child of the root
-- Two tabs mean that the clade or leaf is the grandchild of the root and so on
-- The topology string must include all taxon names and branch lengths
-- The Newick string must include branch lengths exactly as shown in the image or from inferring them from the scale bar
-- The Newick must always include branch lengths, either from the branch labels or from inferring them from the scale bar
-- Only if there is no scale bar and no branch labels, dont include the distances e.g. Clade(branch_length=, name='Crassulaceae')
+{_TOPO_RULES}- The topology string must include all taxon names and branch lengths
+{_BRANCH_LENGTH_RULE}{_ALWAYS_BRANCH_LENGTHS_RULE}- Only if there is no scale bar and no branch labels, dont include the distances e.g. Clade(branch_length=, name='Crassulaceae')
 - Only if there are no branch labels, scale bar and no taxa output just the topology e.g. Clade(branch_length=, name=)
 """
-    
-    
\ No newline at end of file
+
+# read-only lookup of the instructions by approach and format i.e. the --approach and --format of 
+# newick_extraction_openai, the values are the module level strings above and not copies of them
+PROMPTS = MappingProxyType({
+    ("extract_nwk", "regular"): instr_nwk_regular,
+    ("extract_nwk", "taxa_only"): instr_nwk_taxa_only,
+    ("extract_nwk", "topo_only"): instr_nwk_topo_only,
+    ("extract_nwk", "no_format"): instr_nwk_all_cases,
+    ("extract_topo", "regular"): instr_topo_regular,
+    ("extract_topo", "taxa_only"): instr_topo_taxa_only,
+    ("extract_topo", "topo_only"): instr_topo_topo_only,
+    ("extract_topo", "no_format"): instr_topo_all_cases,
+})
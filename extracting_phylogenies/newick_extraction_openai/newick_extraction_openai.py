@@ -1,12 +1,31 @@
 import sys
 import os
+import stat # checking file types of a single os.stat call
 import base64
+import mmap # encoding images without reading them into memory first
+import io
 import argparse
 import re
-from openai import OpenAI
+import asyncio # running several extraction jobs concurrently
+import json
+import time
+import hashlib # keys of the response cache
+import importlib.util # detecting optional packages without importing them
+from openai import OpenAI, BadRequestError, DefaultHttpxClient
+import httpx # limits and timeouts of the http client shared by all requests, installed with openai
+# h2 is optional (pip install httpx[http2]), without it requests go over pooled HTTP/1.1 connections
+HTTP2 = importlib.util.find_spec("h2") is not None
 from ete3 import Tree
+from PIL import Image # downscaling images sent in low detail
+try:
+    from diskcache import Cache # caching responses across runs
+except ImportError:
+    # diskcache is optional, without it responses are only cached for the current run
+    Cache = None
 from extracting_phylogenies.utilities import newick_util as ut
 import logging
+from functools import cache, cached_property
+from itertools import chain, islice, pairwise
 from extracting_phylogenies.newick_extraction_openai import instructions as instr
 
 # create logger
@@ -15,8 +34,88 @@ console_logger = logging.getLogger(__name__)
 api_key = os.getenv("BA_API_KEY")
 if api_key is None:
     raise RuntimeError("Couldn't find BA_API_KEY. Please create a custom environment variable for this script.")
-# create client
-client = OpenAI(api_key=api_key)
+# create client, all requests share one pool of keep-alive connections, concurrent requests of run_many are multiplexed 
+# over them if HTTP/2 is available, the timeouts are the ones OpenAI uses by default, DefaultHttpxClient keeps the 
+# other defaults of the OpenAI client e.g. following redirects
+http_client = DefaultHttpxClient(
+    http2=HTTP2,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    timeout=httpx.Timeout(600.0, connect=5.0),
+)
+client = OpenAI(api_key=api_key, http_client=http_client)
+# prompts of both approaches
+NWK_PROMPT = "Give me the Newick string of this phylogenetic tree."
+TOPO_PROMPT = "Give me the hierarchical text format corresponding to this phylogenetic."
+# file endings of supported images
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg")
+# images sent in low detail are downscaled to this size on their long edge before encoding, the model only sees a 
+# 512px version of them anyway
+LOW_DETAIL_SIZE = 1024
+CORRECTION_PROMPT = "This is a phylogenetic tree and this the corresponding erroneous Newick: {newick}. The Newick " \
+    "string might have spelling mistakes, missing taxa and wrong formatting. Give me the correct Newick string."
+# patterns used for parsing the responses, compiled once on import
+_NWK_RE = re.compile(r"\(.+;")
+_BRANCH_LEN_RE = re.compile(r":\d+(\.\d+){0,1}")
+_TAXON_RE = re.compile(r"(?<=[,(])[\d\w\.\-\"\'#]+(?=[\:\)\,])")
+_FILE_ID_RE = re.compile(r"\d+(?=\..{2,4})")
+_TOPO_BL_RE = re.compile(r"(?<=branch_length=)\d")
+_TOPO_NAME_RE = re.compile(r"(?<=name=)[\']{0,1}\w")
+_NAME_LINE_RE = re.compile(r"(?<=name=[\'\"]).+(?=[\'\"]\))")
+_DIST_LINE_RE = re.compile(r"(?<=branch_length=)\d+(\.\d+){0,1}")
+# characters ete3 replaces with "_" in taxon names when writing a newick
+_ILLEGAL_NAME_CHARS_RE = re.compile(r"[:;(),\[\]\t\n\r=]")
+# models whose streamed requests were rejected e.g. gpt-5 and o4-mini for organizations that aren't verified, their 
+# responses are requested without streaming for the rest of the run
+_NO_STREAM_MODELS = set()
+
+def find_newick(text):
+    """
+    Given a response text returns the newick in it i.e. the match of _NWK_RE or None if there is no newick. Responses 
+    usually are nothing but the newick, in that case the newick is cut out with str.find and str.rfind instead of the 
+    regex.
+
+    Args:
+        text (str): response text by the model
+
+    Returns:
+        str: newick or None
+    """
+    start = text.find("(")
+    end = text.rfind(";")
+    # same as the regex match if the newick has no line breaks since "." doesn't match them
+    if 0 <= start < end - 1 and "\n" not in text[start:end]:
+        return text[start:end + 1]
+    return match.group() if (match := _NWK_RE.search(text)) else None
+
+def get_file_mode(path):
+    """
+    Returns the file mode of the path with a single stat call or 0 if the path doesn't exist (or can't be accessed) 
+    like os.path.isdir and os.path.isfile do. Check the file type with stat.S_ISDIR or stat.S_ISREG.
+
+    Args:
+        path (str): path to a file or directory
+
+    Returns:
+        int: file mode
+    """
+    try:
+        return os.stat(path).st_mode
+    except (OSError, ValueError):
+        return 0
+
+def write_file_atomically(path, text):
+    """
+    Writes the text into a temporary file next to path and swaps it in with os.replace so that path either keeps its 
+    old content or gets the full text but is never left truncated or half written if writing fails.
+
+    Args:
+        path (str): path of the file
+        text (str): content of the file
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", buffering=1 << 16) as tmp_file:
+        tmp_file.write(text)
+    os.replace(tmp_path, path)
 
 def get_image_from_directory(dir_path):
     """
@@ -28,20 +127,40 @@ def get_image_from_directory(dir_path):
     Args:
         dir_path (str): path to the directory containing the image of a phylogenetic tree and the corresponding newick tree
     """
-    image_path = ""
-    if not os.path.exists(dir_path):
+    if not (mode := get_file_mode(dir_path)):
         raise FileNotFoundError(f"No such file or directory: {dir_path}") 
-    elif not os.path.isdir(dir_path):
+    elif not stat.S_ISDIR(mode):
         raise IsADirectoryError(f"Expected filepath but got directory path.")
-    else:
-        for image in os.listdir(dir_path):
-            if image.endswith(".png") or image.endswith(".jpg") or image.endswith(".jpeg"):
-                image_path = dir_path + str(f"\\{image}")
-                break
-    if image_path:
-        return image_path
-    else: 
-        raise ValueError(f"No image found: {dir_path}.") 
+    # scan the entries lazily and stop at the first image
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.name.endswith(IMAGE_SUFFIXES) and entry.is_file():
+                return os.path.join(dir_path, entry.name)
+    raise ValueError(f"No image found: {dir_path}.") 
+
+def expand_infile_paths(infile_paths):
+    """
+    Given infile paths returns the infile path of every extraction job. A directory without an image but with 
+    subdirectories, e.g. a dataset directory, stands for its subdirectories in alphabetical order, which each contain an 
+    image. All other paths are returned unchanged.
+
+    Args:
+        infile_paths (list[str]): paths to images, directories containing an image or directories of such directories
+
+    Returns:
+        list[str]: paths to images or directories containing an image
+    """
+    expanded_paths = []
+    for infile_path in infile_paths:
+        if stat.S_ISDIR(get_file_mode(infile_path)):
+            with os.scandir(infile_path) as entries:
+                entries = list(entries)
+            subdirs = sorted(entry.path for entry in entries if entry.is_dir())
+            if subdirs and not any(entry.name.endswith(IMAGE_SUFFIXES) and entry.is_file() for entry in entries):
+                expanded_paths.extend(subdirs)
+                continue
+        expanded_paths.append(infile_path)
+    return expanded_paths
 
 # TODO: add to utilities class
 def get_file_id(dir_path):
@@ -57,22 +176,44 @@ def get_file_id(dir_path):
         file_id (str): string of number at the end of the image filename 
     """
     file_path = get_image_from_directory(dir_path)
-    if not (match_obj := re.search(r"\d+(?=\..{2,4})", file_path)) == None:
+    if not (match_obj := _FILE_ID_RE.search(file_path)) == None:
         file_id = match_obj.group()
         return file_id
     else: 
         return ""
         
 # Function to encode the image
-def encode_image(image_path):
+def encode_image(image_path, max_size=None):
+    """
+    Returns the base64 encoded image. If max_size is given and the image is larger than max_size on its long edge, the 
+    image is downscaled to max_size on its long edge before encoding.
+    """
+    if max_size is not None:
+        with Image.open(image_path) as image:
+            if max(image.size) > max_size:
+                image_format = image.format
+                image.thumbnail((max_size, max_size), Image.LANCZOS)
+                buffer = io.BytesIO()
+                image.save(buffer, format=image_format)
+                return base64.b64encode(buffer.getbuffer()).decode("ascii")
     with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
+        # empty files can't be memory-mapped
+        if os.fstat(image_file.fileno()).st_size == 0:
+            return ""
+        # encode straight from the mapped file instead of copying it into a bytes object first, base64 is pure ascii
+        with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_image:
+            return base64.b64encode(mapped_image).decode("ascii")
     
 class Newick_Extraction_Job:
     """
     An instance of the Extractor class hold all values needed for extracting the newick from an image of a phylogenetic
     tree and saving it to file.
     """
+    # models that can be used for extraction
+    _SUPPORTED_MODELS = frozenset({"gpt-4.1", "o4-mini", "gpt-4o", "gpt-5", "gpt-4.1_finetuned"})
+    # models that support temperature and top_p, gpt-5 and o4-mini dont
+    _SUPPORTS_TEMP = frozenset({"gpt-4.1", "gpt-4o"})
+
     def __init__(
         self,
         infile_path, # path to image or dir containing image
@@ -84,6 +225,8 @@ class Newick_Extraction_Job:
         outfile_path = None,
         file_id = None,
         approach = "extract_nwk",
+        detail = "auto",
+        use_cache = False,
         # get_taxa_first = False,
     ):
         self.infile_path = infile_path
@@ -95,6 +238,10 @@ class Newick_Extraction_Job:
         self.outfile_path = outfile_path
         self.file_id = file_id
         self.approach = approach
+        # image detail of the requests, "auto" (OpenAI's default), "low" or "high"
+        self.detail = detail
+        # whether responses are looked up in and saved to the response cache
+        self.use_cache = use_cache
         # self.get_taxa_first = get_taxa_first
         
     def write_extracted_newick_to_file(self):
@@ -111,7 +258,8 @@ class Newick_Extraction_Job:
             app = "nwk_" if self.approach == "extract_nwk" else "topo_" if self.approach == "extract_topo" else ""
             # flag = "taxa_" if self.get_taxa_first else ""
             # if outfile path points to dir save it in the dir, if it points to a file then create the file
-            if os.path.isdir(self.outfile_path):
+            outfile_mode = get_file_mode(self.outfile_path)
+            if stat.S_ISDIR(outfile_mode):
                 # create predictions directory for the extracted newick if it doesnt already exist in the specified dir
                 predictions_path = "predictions"
                 parent_path = self.outfile_path
@@ -119,12 +267,10 @@ class Newick_Extraction_Job:
                 newick_path = f"{self.model}_{app}{self.file_id}.nwk"
                 os.makedirs(dir_path := os.path.join(parent_path, predictions_path), exist_ok=True)  
                 # # if the file already exists the current file content will be overwritten
-                with open(os.path.join(dir_path, newick_path), "w") as nwk_file:
-                    nwk_file.write(self.newick)
-            elif os.path.isfile(self.outfile_path):
+                write_file_atomically(os.path.join(dir_path, newick_path), self.newick)
+            elif stat.S_ISREG(outfile_mode):
                 # if the file already exists the current file content will be overwritten
-                with open(self.outfile_path, "w") as nwk_file:
-                    nwk_file.write(self.newick)
+                write_file_atomically(self.outfile_path, self.newick)
             else: 
                 raise FileNotFoundError(f" Error in write_extracted_newick_to_file: outfile_path {self.outfile_path} is not valid.")
         # if no outfile path was given, save the newick in the current working directory
@@ -134,8 +280,7 @@ class Newick_Extraction_Job:
                 raise FileExistsError(f"File already exists") 
             else:
                 # with open(f".\\{self.model}_{app}{flag}{self.file_id}.nwk", "w") as nwk_file:
-                with open(f".\\{self.model}_{app}{self.file_id}.nwk", "w") as nwk_file:
-                    nwk_file.write(self.newick)
+                write_file_atomically(f".\\{self.model}_{app}{self.file_id}.nwk", self.newick)
                     
     # TODO utilities class?
     def get_image_path(self):
@@ -148,13 +293,42 @@ class Newick_Extraction_Job:
             str: path to image in Newick_Extraction_Job object's infile_path
         """
         # if the infile path is a dir get the img from the dir
-        if os.path.isdir(self.infile_path):
+        infile_mode = get_file_mode(self.infile_path)
+        if stat.S_ISDIR(infile_mode):
             return get_image_from_directory(self.infile_path)
         # if infile path is a file then get the img directly
-        elif os.path.isfile(self.infile_path):
+        elif stat.S_ISREG(infile_mode):
             return self.infile_path
         else:
             raise FileNotFoundError(f"Infile path does not exist: {self.infile_path}")
+
+    @cached_property
+    def image_path(self):
+        """
+        Path of the job's image, resolved once per job (see get_image_path).
+        """
+        return self.get_image_path()
+
+    @cached_property
+    def image_format(self):
+        """
+        Format of the job's image i.e. png, jpg or jpeg.
+        """
+        return ut.get_image_format(self.image_path)
+
+    @cached_property
+    def b64_image(self):
+        """
+        Base64 encoded image, read and encoded once per job and reused by every request e.g. by correct_newick.
+        """
+        return encode_image(self.image_path)
+
+    @cached_property
+    def b64_low_detail_image(self):
+        """
+        Base64 encoded image downscaled to LOW_DETAIL_SIZE, read and encoded once per job like b64_image.
+        """
+        return encode_image(self.image_path, max_size=LOW_DETAIL_SIZE)
         
     def get_completions_api_args(self, model, instructions, prompt, b64_image):
         args = {
@@ -175,7 +349,8 @@ class Newick_Extraction_Job:
                             "type": "image_url", 
                             "image_url": 
                                 {
-                                    "url":f"data:image/{ut.get_image_format(self.get_image_path())};base64,{b64_image}"
+                                    "url":f"data:image/{self.image_format};base64,{b64_image}",
+                                    "detail":self.detail,
                                 }
                         },
                     ],
@@ -194,61 +369,135 @@ class Newick_Extraction_Job:
                     "content": [
                         { "type": "input_text", "text": prompt},
                         { "type": "input_image", "image_url": 
-                            f"data:image/{ut.get_image_format(self.get_image_path())};base64,{b64_image}"},
+                            f"data:image/{self.image_format};base64,{b64_image}", "detail": self.detail},
                     ],
                 }
             ],
         }
         return args
         
-    def extract_newick_directly(self, instructions):
+    def get_prompt(self):
         """
-        Given a path to an image (png, jpg or jpeg) and a OpenAI model returns the newick.
-        "Directly" refers to the fact that the AI is not given the taxa in a first step and tasked with generating
-        the Newick format directly instead of letting the AI write out the basic hierarchical structure of the image and 
-        then extracting the Newick from that manually.
+        Returns the prompt matching the job's approach.
+
+        Returns:
+            str: prompt
+        """
+        return TOPO_PROMPT if self.approach == "extract_topo" else NWK_PROMPT
+
+    def get_request(self, instructions, prompt=None):
+        """
+        Returns the endpoint and the arguments of the API request that sends the job's image to the job's model. 
+        The finetuned model only supports the chat completions API, all other models use the responses API. In low 
+        detail the downscaled image is sent, otherwise the full image.
 
         Args:
-            image_path (str): path to the image
-            model (str, optional): OpenAI model that is used. Defaults to "gpt-4.1".
+            instructions (str): model instructions
+            prompt (str, optional): prompt. Defaults to None i.e. the prompt of the job's approach.
 
         Returns:
-            str: response text by the model
+            tuple(str, dict): endpoint ("/v1/chat/completions" or "/v1/responses") and request arguments
         """
-        if not self.model in ["gpt-4.1", "o4-mini", "gpt-4o", "gpt-5", "gpt-4.1_finetuned"]:
-            raise ValueError(f"""Error in generate_newick_from_image_directly: Given model is not 
-                             supported. Please choose from gpt-4.1, o4-mini, gpt-4o, gpt-5 or gpt-4.1_finetuned""")
-        img_path = self.get_image_path()
-        prompt = "Give me the Newick string of this phylogenetic tree."
-        instructions =  instructions
-        b64_image = encode_image(img_path)
+        if self.model not in self._SUPPORTED_MODELS:
+            raise ValueError(f"""Error in get_request: Given model is not supported. Please choose from gpt-4.1, 
+                             o4-mini, gpt-4o, gpt-5 or gpt-4.1_finetuned""")
+        if prompt is None:
+            prompt = self.get_prompt()
+        b64_image = self.b64_low_detail_image if self.detail == "low" else self.b64_image
         # if model is finetuned then use the chat completions api instead of the responses api
         if self.model == "gpt-4.1_finetuned":
             model = "ft:gpt-4.1-2025-04-14:markus:512px-rand-10taxa:C5bcZvYh"
             args = self.get_completions_api_args(model=model,instructions=instructions,prompt=prompt, b64_image=b64_image)
-            output = client.chat.completions.create(**args).choices[0].message.content
-        else:
-            args = self.get_reponse_api_args(instructions=instructions,prompt=prompt,b64_image=b64_image)
-            # set temperature and top_p only for 4.1 and 4o because 5 and o4 dont support it
-            if self.model == "gpt-4.1" or self.model == "gpt-4o":
-                args["temperature"] = 0.0
-                args["top_p"] = 0.0
-            output = client.responses.create(**args).output_text
-        console_logger.info(f"Model response: {output}")
+            return "/v1/chat/completions", args
+        args = self.get_reponse_api_args(instructions=instructions,prompt=prompt,b64_image=b64_image)
+        # set temperature and top_p only for 4.1 and 4o because 5 and o4 dont support it
+        if self.model in self._SUPPORTS_TEMP:
+            args["temperature"] = 0.0
+            args["top_p"] = 0.0
+        return "/v1/responses", args
+
+    def parse_newick(self, output):
+        """
+        Given the response of the model returns the newick in it. Sets taxa_only and topo_only if the newick has no 
+        branch lengths or neither branch lengths nor taxa.
+
+        Args:
+            output (str): response text by the model
+
+        Raises:
+            ValueError: no newick in the response
+
+        Returns:
+            str: newick
+        """
+        console_logger.info("Model response: %s", output)
         # parse the newick from the reponse
-        if re.search(r"\(.+;", output):
-            newick = re.search(r"\(.+;", output).group()
-        else:
+        if (newick := find_newick(output)) is None:
             raise ValueError(f"No Newick found in model response.")
-        console_logger.info(f"Extracted newick: {newick}")
+        console_logger.info("Extracted newick: %s", newick)
         # set taxa_only and topo_only to true if topology has no distances or no distances and no taxon names
-        if not (branch_lengths := re.search(r":\d+(\.\d+){0,1}", newick)) and not \
-            re.search(r"(?<=[,(])[\d\w\.\-\"\'#]+(?=[\:\)\,])", newick):
+        if not (branch_lengths := _BRANCH_LEN_RE.search(newick)) and not _TAXON_RE.search(newick):
                 self.topo_only = True
         elif not branch_lengths:
             self.taxa_only = True
         return newick
 
+    def parse_topology(self, output):
+        """
+        Given the response of the model returns the topology in hierarchical text format. Sets taxa_only and topo_only 
+        if the topology has no branch lengths or neither branch lengths nor taxa.
+
+        Args:
+            output (str): response text by the model
+
+        Returns:
+            str: topology in simplified Bio.Python print(tree) format
+        """
+        # set taxa_only and topo_only to true if topology has no distances or no distances and no taxon names
+        if not (branch_lengths := _TOPO_BL_RE.search(output)) and not _TOPO_NAME_RE.search(output):
+                self.topo_only = True
+        elif not branch_lengths:
+            self.taxa_only = True
+        console_logger.info("Extracted topology: %s", output)
+        console_logger.info("Topology is taxa-only: %s", self.taxa_only)
+        console_logger.info("Topology is topo-only: %s", self.topo_only)
+        return output
+
+    def get_newick_from_output(self, output):
+        """
+        Given the response of the model returns the (not yet postprocessed) newick according to the job's approach i.e. 
+        parses the newick from the response or builds it from the topology in the response.
+
+        Args:
+            output (str): response text by the model
+
+        Returns:
+            str: newick
+        """
+        if self.approach == "extract_nwk":
+            return self.parse_newick(output)
+        elif self.approach == "extract_topo":
+            self.topology = self.parse_topology(output)
+            return self.extract_newick_from_topology()
+        else:
+            raise ValueError(f"Unknown approach: {self.approach}")
+        
+    def extract_newick_directly(self, instructions):
+        """
+        Given a path to an image (png, jpg or jpeg) and a OpenAI model returns the newick.
+        "Directly" refers to the fact that the AI is not given the taxa in a first step and tasked with generating
+        the Newick format directly instead of letting the AI write out the basic hierarchical structure of the image and 
+        then extracting the Newick from that manually.
+
+        Args:
+            instructions (str): model instructions
+
+        Returns:
+            str: newick in the response of the model
+        """
+        endpoint, args = self.get_request(instructions, prompt=NWK_PROMPT)
+        return self.parse_newick(send_request(endpoint, args, use_cache=self.use_cache, stop_at_newick=True))
+
     def extract_newick_from_topology(self):
         """
         Used on a Newick_Extraction_Job object with a topology similar to that of Bio.Phylo created by a model  returns 
@@ -261,50 +510,93 @@ class Newick_Extraction_Job:
             str: newick corresponding to the hierarchical text format
         """
         def get_name(line):
-            return match.group() if (match := re.search(r"(?<=name=[\'\"]).+(?=[\'\"]\))", line)) else None
+            return match.group() if (match := _NAME_LINE_RE.search(line)) else None
         def get_dist(line):
-            return match.group() if (match := re.search(r"(?<=branch_length=)\d+(\.\d+){0,1}", line)) else None
-        def get_indentation_level(line):
-            # one tab is 4 spaces
-            return (len(line) - len(line.lstrip())) / 4
+            return match.group() if (match := _DIST_LINE_RE.search(line)) else None
+        def get_indentation(line):
+            # number of leading whitespace characters, one indentation level is 4 spaces
+            return len(line) - len(line.lstrip())
+        def write_without_lengths(lines):
+            # walks the lines like the loop below but writes the newick directly, closing each internal node when it is 
+            # popped, for every open internal node (starting with the root) remember whether it already has a child
+            newick = []
+            has_children = [False]
+            current_indentation = get_indentation(lines[1]) if len(lines) > 1 else 0
+            for current_line, next_line in pairwise(chain(islice(lines, 1, None), (None,))):
+                if next_line is not None:
+                    next_indentation = get_indentation(next_line)
+                is_internal_node = next_line is not None and next_indentation > current_indentation
+                if has_children[-1]:
+                    newick.append(",")
+                has_children[-1] = True
+                if is_internal_node:
+                    newick.append("(")
+                    has_children.append(False)
+                elif (name := get_name(current_line)) is not None:
+                    newick.append(_ILLEGAL_NAME_CHARS_RE.sub("_", name))
+                if next_line is None:
+                    break
+                if not is_internal_node and next_indentation < current_indentation:
+                    for _ in range((current_indentation - next_indentation) >> 2):
+                        has_children.pop()
+                        newick.append(")")
+                current_indentation = next_indentation
+            # close all internal nodes that are still open, a root without children is written as an empty tree
+            if has_children[0]:
+                newick.append(")" * len(has_children))
+                newick.insert(0, "(")
+            newick.append(";")
+            return "".join(newick)
         # get each line of the topology string
-        lines = self.topology.split("\n")
+        lines = self.topology.splitlines()
+        # without branch lengths the placeholder distances and support values ete3 writes would be removed right away, 
+        # so skip building the tree and write the newick directly
+        if (self.taxa_only or self.topo_only) and not _TOPO_BL_RE.search(self.topology):
+            newick = write_without_lengths(lines)
+            console_logger.info("Newick extracted from topology: %s", newick)
+            return newick
         # create ete3 tree object with root
         tree = Tree()
         current_parent = tree
         # remember the order of the internal nodes with a stack
         internal_nodes_stack = [tree]
-        # loop starts with first child of the root
-        for i in range(1, len(lines)):
-            current_indentation = get_indentation_level(lines[i]) 
-            next_indentation = get_indentation_level(lines[i+1]) if i+1 < len(lines) else -1 
-            if i+1 < len(lines) and next_indentation > current_indentation:
-                # if next line is indented more then the current line is an internal node
-                internal_node = current_parent.add_child(dist=get_dist(lines[i]))
-                internal_nodes_stack.append(internal_node)
+        # loop starts with first child of the root, each line is paired with the next one and the last one with None, 
+        # the indentation of the next line is carried over to the next iteration
+        current_indentation = get_indentation(lines[1]) if len(lines) > 1 else 0
+        for current_line, next_line in pairwise(chain(islice(lines, 1, None), (None,))):
+            # if next line is indented more then the current line is an internal node, otherwise it is a leaf
+            if next_line is not None:
+                next_indentation = get_indentation(next_line)
+            is_internal_node = next_line is not None and next_indentation > current_indentation
+            # create the node and add it to the current internal node directly instead of through add_child
+            node = Tree()
+            if (dist := get_dist(current_line)) is not None:
+                node.dist = dist
+            if not is_internal_node and (name := get_name(current_line)) is not None:
+                node.name = name
+            current_parent.children.append(node)
+            node.up = current_parent
+            if next_line is None:
+                # there is no next line, the tree is complete
+                break
+            if is_internal_node:
+                internal_nodes_stack.append(node)
                 # update the current node to add children to current line
-                current_parent = internal_node
-            elif i+1 < len(lines) and next_indentation == current_indentation:
-                # if next line has the same indentation then the current line is a leaf 
-                current_parent.add_child(name=get_name(lines[i]), dist=get_dist(lines[i]))
-            elif i+1 < len(lines) and next_indentation < current_indentation:
-                # if next line has less indentation then the current line is a leaf and the next line belongs to another 
-                # parent node and the current one is finished
-                current_parent.add_child(name=get_name(lines[i]), dist=get_dist(lines[i]))
-                # pop all internal nodes that are now finished
-                for j in range(int(current_indentation - next_indentation)):
+                current_parent = node
+            elif next_indentation < current_indentation:
+                # if next line has less indentation then the next line belongs to another parent node and the current 
+                # one is finished, pop all internal nodes that are now finished
+                for _ in range((current_indentation - next_indentation) >> 2):
                     internal_nodes_stack.pop()
                 # assign current_parent the new topmost node of the stack
-                current_parent = internal_nodes_stack[len(internal_nodes_stack)-1]
-            else:
-                # there is no next line, add leaf to current internal node
-                current_parent.add_child(name=get_name(lines[i]), dist=get_dist(lines[i]))
+                current_parent = internal_nodes_stack[-1]
+            current_indentation = next_indentation
         # remove support vals to not confuse postprocessing
         newick = ut.remove_support_vals(tree.write())
         # remove placeholder distances added by ete3 if image doesnt have distances
         if self.taxa_only or self.topo_only:
             newick = ut.remove_distances(newick)
-        console_logger.info(f"Newick extracted from topology: {newick}")
+        console_logger.info("Newick extracted from topology: %s", newick)
         return newick
 
     def extract_topology(self, instructions):
@@ -334,41 +626,13 @@ class Newick_Extraction_Job:
                        |_______ Wolbachia_pipientis
         
         Args:
-            image_path (str): path to the image
-            model (str, optional): OpenAI model that is used. Defaults to "gpt-4.1".
+            instructions (str): model instructions
 
         Returns:
             str: response text by the model, topology in simplified Bio.Python print(tree) format
         """
-        if not self.model in ["gpt-4.1", "o4-mini", "gpt-4o", "gpt-5", "gpt-4.1_finetuned"]:
-            raise ValueError(f"""Error in generate_newick_from_image_directly: Given model is not supported. Please 
-                             choose from gpt-4.1, o4-mini, gpt-4o, gpt-5 or gpt-4.1_finetuned""")
-        img_path = self.get_image_path()
-        prompt = """Give me the hierarchical text format corresponding to this phylogenetic."""
-        instructions =  instructions
-        b64_image = encode_image(img_path)
-        # get response
-        if self.model == "gpt-4.1_finetuned":
-            model = "ft:gpt-4.1-2025-04-14:markus:512px-rand-10taxa:C5bcZvYh"
-            args = self.get_completions_api_args(model=model,instructions=instructions,prompt=prompt,b64_image=b64_image)
-            output = client.chat.completions.create(**args).choices[0].message.content
-        else:
-            args = self.get_reponse_api_args(instructions=instructions,prompt=prompt,b64_image=b64_image)
-            # conditionally include temperature and top_p in the args because o4-mini and gpt5 do not support it
-            if self.model == "gpt-4.1" or self.model == "gpt-4o":
-                args["temperature"] = 0.0
-                args["top_p"] = 0.0
-            output = client.chat.completions.create(**args).output_text
-        # set taxa_only and topo_only to true if topology has no distances or no distances and no taxon names
-        if not (branch_lengths := re.search(r"(?<=branch_length=)\d", output)) and not \
-            re.search(r"(?<=name=)[\']{0,1}\w", output):
-                self.topo_only = True
-        elif not branch_lengths:
-            self.taxa_only = True
-        console_logger.info(f"Extracted topology: {output}")
-        console_logger.info(f"Topology is taxa-only: {self.taxa_only}")
-        console_logger.info(f"Topology is topo-only: {self.topo_only}")
-        return output
+        endpoint, args = self.get_request(instructions, prompt=TOPO_PROMPT)
+        return self.parse_topology(send_request(endpoint, args, use_cache=self.use_cache))
     
     def postprocess_newick(self, newick, ai_postprocessing = False):
         """
@@ -390,79 +654,353 @@ class Newick_Extraction_Job:
             console_logger.info("Newick is topology-only.")
             self.topo_only = True
             format = 100
-        # if newick's formatting is correct skip AI postprocessing otherwise do it
-        if ut.is_newick(newick, format=format):
+        def write_tree(tree):
             # remove duplicate leaves
             if not self.topo_only:
-                newick = ut.remove_duplicate_leaves(newick)
-            console_logger.info(f"Skipping post-processing.")    
-            # create tree and write it to let ete3 remove unnecessary parentheses and spaces
-            newick = Tree(newick, format=format).write()
+                ut.detach_duplicate_leaves(tree)
+            # write the tree to let ete3 remove unnecessary parentheses and spaces
+            newick = tree.write()
             # remove placeholder distances by ete3 if newick originally didnt have any
             if self.taxa_only or self.topo_only:
                 newick = ut.remove_distances(newick)
             # remove support values
             newick = ut.remove_support_vals(newick)
-            console_logger.info(f"Post-processing was successful. Newick: {newick}")
+            console_logger.info("Post-processing was successful. Newick: %s", newick)
             return newick
+        # if newick's formatting is correct skip AI postprocessing otherwise do it, the tree is parsed once and reused
+        if (tree := ut.get_tree(newick, format=format)) is not None:
+            console_logger.info("Skipping post-processing.")    
+            return write_tree(tree)
         else:
             if ai_postprocessing == True:
-                console_logger.info(f"Starting AI-postprocessing.")
+                console_logger.info("Starting AI-postprocessing.")
                 newick = self.correct_newick(newick)
                 if not ut.is_newick(newick):
-                    console_logger.info(f"AI post-processing failed. Continuing with manual postprocessing.")
+                    console_logger.info("AI post-processing failed. Continuing with manual postprocessing.")
             # remove special chars from taxa by removing them from each taxon seperately
-            newick = re.sub(
-                r"(?<=[,(])[\d\w\.\-\"\'#]+(?=[\:\)\,])", # matches taxa
-                lambda t: ut.remove_special_chars(t.group()), 
-                newick)
+            newick = _TAXON_RE.sub(lambda t: ut.remove_special_chars(t.group()), newick)
             # balance parentheses if necessary
             if not ut.is_balanced(newick):
                 console_logger.info("Balancing out parentheses.")
                 newick = ut.balance_parentheses(newick)
-            # create tree and write it to let ete3 remove unnecessary parentheses and spaces
-            if ut.is_newick(newick, format=format):
-                # remove duplicate leaves
-                if not self.topo_only:
-                    newick = ut.remove_duplicate_leaves(newick)
-                newick = Tree(newick, format=format).write()
-                # remove placeholder distances by ete3 if newick originally didnt have any
-                if self.taxa_only or self.topo_only:
-                    newick = ut.remove_distances(newick)
-                # remove support values
-                newick = ut.remove_support_vals(newick)
-                console_logger.info(f"Post-processing was successful. Newick: {newick}")
-                return newick
+            if (tree := ut.get_tree(newick, format=format)) is not None:
+                return write_tree(tree)
             # if formatting is still wrong, warn user and return empty tre
             else:
-                console_logger.warning(f"Post-processing failed. Returning empty tree.")
+                console_logger.warning("Post-processing failed. Returning empty tree.")
                 return ";"
         
     def correct_newick(self, erroneous_newick):
         # TODO add doc string
-        b64_image = encode_image(self.get_image_path())
-        prompt=f"""This is a phylogenetic tree and this the corresponding erroneous Newick: {erroneous_newick}. The 
-        Newick string might have spelling mistakes, missing taxa and wrong formatting. Give me the correct Newick string."""
-        instructions = instr.instr_correct_newick
-        # finetuned models do no support the responses api
-        if self.model == "gpt-4.1_finetuned":
-            model = "ft:gpt-4.1-2025-04-14:markus:512px-rand-10taxa:C5bcZvYh"
-            args = self.get_completions_api_args(model=model,instructions=instructions,prompt=prompt, b64_image=b64_image)
-            output = client.chat.completions.create(**args).choices[0].message.content
-        else:
-            args = self.get_reponse_api_args(instructions=instructions,prompt=prompt,b64_image=b64_image)
-            # conditionally include temperature and top_p in the args because o4-mini and gpt-5 do not support it
-            if self.model == "gpt-4.1" or self.model == "gpt-4o":
-                args["temperature"] = 0.0
-                args["top_p"] = 0.0
-            output = client.responses.create(**args).output_text
-        if re.search(r"\(.+;", output):
-            updated_newick = re.search(r"\(.+;", output).group()
-        else:
-            console_logger.warning(f"No Newick found in the model's response. Returning empty newick.")
+        prompt = CORRECTION_PROMPT.format(newick=erroneous_newick)
+        endpoint, args = self.get_request(instr.instr_correct_newick, prompt=prompt)
+        output = send_request(endpoint, args, use_cache=self.use_cache, stop_at_newick=True)
+        if (updated_newick := find_newick(output)) is None:
+            console_logger.warning("No Newick found in the model's response. Returning empty newick.")
             return ";"
         return updated_newick
 
+@cache
+def get_response_cache():
+    """
+    Returns the response cache, created on first use. Responses are cached by the hash of their request so rerunning 
+    the same request e.g. on the same image with the same model and instructions returns the cached response instead 
+    of sending it again. With diskcache installed the cache persists across runs, otherwise only for the current run.
+
+    Returns:
+        diskcache.Cache | dict: response cache
+    """
+    return Cache(os.path.expanduser("~/.cache/newick_extraction")) if Cache is not None else dict()
+
+def get_cache_key(endpoint, args):
+    """
+    Returns the key of a request in the response cache. The key covers everything that is sent i.e. image, detail, 
+    model, instructions, prompt and sampling parameters.
+
+    Args:
+        endpoint (str): "/v1/chat/completions" or "/v1/responses"
+        args (dict): request arguments
+
+    Returns:
+        str: sha256 hex digest of the request
+    """
+    return hashlib.sha256(json.dumps([endpoint, args], sort_keys=True).encode("utf-8")).hexdigest()
+
+def read_until_newick(deltas):
+    """
+    Given the text deltas of a streamed response returns the response text up to the end of the newick in it i.e. up 
+    to the first ";" outside of parentheses after the first "(". Stops consuming the deltas there. If the newick never 
+    ends the whole response text is returned.
+
+    Args:
+        deltas (iterable[str]): text deltas of a streamed response
+
+    Returns:
+        str: response text up to and including the ";" of the newick
+    """
+    text = []
+    depth = 0
+    opened = False
+    for delta in deltas:
+        for index, char in enumerate(delta):
+            if char == "(":
+                depth += 1
+                opened = True
+            elif char == ")":
+                depth -= 1
+            elif char == ";" and opened and depth <= 0:
+                text.append(delta[:index + 1])
+                return "".join(text)
+        text.append(delta)
+    return "".join(text)
+
+def stream_until_newick(endpoint, args):
+    """
+    Sends a streamed request to the given endpoint and returns the response text up to the end of the newick in it 
+    (see read_until_newick). The stream is closed there.
+
+    Args:
+        endpoint (str): "/v1/chat/completions" or "/v1/responses"
+        args (dict): request arguments
+
+    Returns:
+        str: response text by the model up to the end of the newick
+    """
+    if endpoint == "/v1/chat/completions":
+        # leaving the with block closes the stream
+        with client.chat.completions.create(**args, stream=True) as stream:
+            return read_until_newick(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+    with client.responses.create(**args, stream=True) as stream:
+        return read_until_newick(event.delta for event in stream if event.type == "response.output_text.delta")
+
+def send_request(endpoint, args, use_cache=False, stop_at_newick=False):
+    """
+    Sends a request to the given endpoint of the OpenAI API and returns the response text. If use_cache is True and the 
+    exact same request was sent before, the cached response is returned instead. If stop_at_newick is True the response 
+    is streamed and the stream is closed as soon as the newick in it is complete (see read_until_newick), which cancels 
+    the generation of anything the model adds after the newick. If streaming is rejected (400) the request is sent 
+    again without streaming.
+
+    Args:
+        endpoint (str): "/v1/chat/completions" or "/v1/responses"
+        args (dict): request arguments
+        use_cache (bool, optional): whether the response is looked up in and saved to the response cache. 
+        Defaults to False.
+        stop_at_newick (bool, optional): whether to stream the response and stop reading it at the end of the newick. 
+        Only for requests whose response is a newick. Defaults to False.
+
+    Returns:
+        str: response text by the model
+    """
+    if use_cache:
+        key = get_cache_key(endpoint, args)
+        if (cached_output := get_response_cache().get(key)) is not None:
+            console_logger.info("Using cached response.")
+            return cached_output
+    output = None
+    if stop_at_newick and args["model"] not in _NO_STREAM_MODELS:
+        try:
+            output = stream_until_newick(endpoint, args)
+        except BadRequestError as error:
+            # streaming some models requires a verified organization, fall back to a regular request
+            console_logger.warning("Streaming rejected for %s, sending the request without streaming: %s", 
+                                   args["model"], error)
+            _NO_STREAM_MODELS.add(args["model"])
+    if output is None and endpoint == "/v1/chat/completions":
+        output = client.chat.completions.create(**args).choices[0].message.content
+    elif output is None:
+        output = client.responses.create(**args).output_text
+    if use_cache:
+        get_response_cache()[key] = output
+    return output
+
+def get_output_text(endpoint, body):
+    """
+    Given the body of a response in the output file of a batch returns the response text. Unlike the objects returned 
+    by the client the plain json doesn't have an output_text.
+
+    Args:
+        endpoint (str): "/v1/chat/completions" or "/v1/responses"
+        body (dict): response body
+
+    Returns:
+        str: response text by the model
+    """
+    if endpoint == "/v1/chat/completions":
+        return body["choices"][0]["message"]["content"]
+    return "".join(
+        content["text"] 
+        for item in body["output"] if item["type"] == "message" 
+        for content in item["content"] if content["type"] == "output_text"
+    )
+
+def process_output(extraction_job, output):
+    """
+    Given the response of the model for a Newick_Extraction_Job returns the postprocessed newick and saves it to file 
+    if the job has an outfile path.
+
+    Args:
+        extraction_job (Newick_Extraction_Job): job the response belongs to
+        output (str): response text by the model
+
+    Returns:
+        str: postprocessed newick
+    """
+    newick = extraction_job.get_newick_from_output(output)
+    # set the postprocessed newick as the job objects newick
+    extraction_job.newick = extraction_job.postprocess_newick(newick)
+    if extraction_job.outfile_path:
+        extraction_job.write_extracted_newick_to_file()
+    return extraction_job.newick
+
+def run_extraction_job(extraction_job, instructions):
+    """
+    Extracts the newick of a Newick_Extraction_Job using its approach, postprocesses it and saves it to file if the job 
+    has an outfile path. If no newick is found in the response to an image in low detail, the image is sent once more 
+    in high detail.
+
+    Args:
+        extraction_job (Newick_Extraction_Job): job whose newick is extracted
+        instructions (str): model instructions
+
+    Returns:
+        str: postprocessed newick
+    """
+    endpoint, args = extraction_job.get_request(instructions)
+    output = send_request(
+        endpoint, args, use_cache=extraction_job.use_cache, stop_at_newick=extraction_job.approach == "extract_nwk"
+    )
+    try:
+        return process_output(extraction_job, output)
+    except ValueError:
+        if extraction_job.detail != "low":
+            raise
+        # the model couldn't make out the tree in the downscaled image, retry with the full image
+        console_logger.warning("No newick found in low detail. Retrying %s in high detail.", extraction_job.infile_path)
+        extraction_job.detail = "high"
+        return run_extraction_job(extraction_job, instructions)
+
+def get_batch_outputs(batch_lines, endpoint, poll_interval=60):
+    """
+    Sends the requests as one batch to OpenAI's Batch API, polls the batch every poll_interval seconds until it is done 
+    and returns the response texts by custom ID. Failed requests are missing in the returned dict.
+
+    Args:
+        batch_lines (list[str]): json lines of the batch input file
+        endpoint (str): "/v1/chat/completions" or "/v1/responses", the same for all requests
+        poll_interval (int, optional): seconds between two status checks of the batch. Defaults to 60.
+
+    Raises:
+        RuntimeError: batch failed, expired or was cancelled
+
+    Returns:
+        dict: response texts by custom ID
+    """
+    batch_file = client.files.create(file=("batch.jsonl", "\n".join(batch_lines).encode("utf-8")), purpose="batch")
+    batch = client.batches.create(input_file_id=batch_file.id, endpoint=endpoint, completion_window="24h")
+    console_logger.info("Created batch %s with %s requests.", batch.id, len(batch_lines))
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
+        console_logger.info("Batch status: %s", batch.status)
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch.id} {batch.status}.")
+    # the output file isn't ordered like the input file => map responses to their jobs by the custom ID
+    outputs = dict()
+    if batch.output_file_id:
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            result = json.loads(line)
+            if result.get("error") or result["response"]["status_code"] != 200:
+                console_logger.warning("Request %s failed: %s", result["custom_id"], result.get("error"))
+                continue
+            outputs[result["custom_id"]] = get_output_text(endpoint, result["response"]["body"])
+    return outputs
+
+def run_batch(extraction_jobs, instructions, poll_interval=60):
+    """
+    Extracts the newicks of all jobs with a single batch of OpenAI's Batch API, which costs half as much as separate 
+    requests but may take up to 24 hours. The batch is polled every poll_interval seconds until it is done, then every 
+    newick is postprocessed and saved to file if its job has an outfile path.
+
+    Args:
+        extraction_jobs (list[Newick_Extraction_Job]): jobs whose newicks are extracted, all with the same model
+        instructions (str): model instructions
+        poll_interval (int, optional): seconds between two status checks of the batch. Defaults to 60.
+
+    Raises:
+        RuntimeError: batch failed, expired or was cancelled
+
+    Returns:
+        list[str]: postprocessed newicks in the order of the jobs, empty tree (";") for failed requests
+    """
+    # one line per job, the file ID identifies the job's response in the output file, jobs with cached responses are 
+    # left out of the batch
+    batch_lines = []
+    outputs = dict()
+    cache_keys = dict()
+    for extraction_job in extraction_jobs:
+        endpoint, args = extraction_job.get_request(instructions)
+        if extraction_job.use_cache:
+            cache_keys[extraction_job.file_id] = key = get_cache_key(endpoint, args)
+            if (cached_output := get_response_cache().get(key)) is not None:
+                outputs[extraction_job.file_id] = cached_output
+                continue
+        batch_lines.append(
+            json.dumps({"custom_id": extraction_job.file_id, "method": "POST", "url": endpoint, "body": args})
+        )
+    if outputs:
+        console_logger.info("Using cached responses for %s of %s images.", len(outputs), len(extraction_jobs))
+    if batch_lines:
+        outputs.update(get_batch_outputs(batch_lines, endpoint, poll_interval))
+        for file_id, key in cache_keys.items():
+            if file_id in outputs:
+                get_response_cache()[key] = outputs[file_id]
+    newicks = []
+    for extraction_job in extraction_jobs:
+        try:
+            try:
+                newicks.append(process_output(extraction_job, outputs[extraction_job.file_id]))
+            except ValueError:
+                if extraction_job.detail != "low":
+                    raise
+                # like run_extraction_job retry in high detail, as regular request instead of another batch
+                console_logger.warning(
+                    "No newick found in low detail. Retrying %s in high detail.", extraction_job.infile_path
+                )
+                extraction_job.detail = "high"
+                newicks.append(run_extraction_job(extraction_job, instructions))
+        except (KeyError, ValueError):
+            # a single failed request or response without newick shouldn't discard the whole batch
+            console_logger.warning("No newick for %s. Returning empty tree.", extraction_job.infile_path)
+            newicks.append(";")
+    return newicks
+
+async def run_many(extraction_jobs, instructions, max_concurrent=10):
+    """
+    Runs several extraction jobs concurrently. The jobs spend nearly all their time waiting for the OpenAI API, so each 
+    job runs in a worker thread while a semaphore keeps at most max_concurrent requests in flight to stay within the 
+    rate limits. Rate limit (429) and server errors are already retried with exponential backoff by the OpenAI client. 
+    Like in run_batch a job that still fails doesn't discard the other jobs, its newick is the empty tree (";").
+
+    Args:
+        extraction_jobs (list[Newick_Extraction_Job]): jobs whose newicks are extracted
+        instructions (str): model instructions
+        max_concurrent (int, optional): maximum amount of jobs running at the same time. Defaults to 10.
+
+    Returns:
+        list[str]: postprocessed newicks in the order of the jobs, empty tree (";") for failed jobs
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+    async def run_bounded(extraction_job):
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(run_extraction_job, extraction_job, instructions)
+            except Exception as error:
+                console_logger.warning("No newick for %s. Returning empty tree. Error: %r", extraction_job.infile_path, 
+                                       error)
+                return ";"
+    return await asyncio.gather(*(run_bounded(extraction_job) for extraction_job in extraction_jobs))
+
 def main():
     argument_parser = argparse.ArgumentParser(
         description="""Newick encoding of images containing phylogenetic trees using AI.\n  Modes:
@@ -503,10 +1041,12 @@ def main():
         format.
         Default: no_format"""
     )
-    argument_parser.add_argument('-i', '--infile_path', required=True, type=str,
+    argument_parser.add_argument('-i', '--infile_path', required=True, type=str, nargs="+",
                                  help="""Path to a directory containing an image of a phylogenetic tree or path to the 
                                  image itself. Be aware that the first image in a specified directory will be 
-                                 chosen.""")
+                                 chosen. A directory without an image but with subdirectories e.g. a dataset is 
+                                 replaced by its subdirectories. If multiple paths are given their newicks are 
+                                 extracted concurrently.""")
     argument_parser.add_argument('-o', '--outfile_path', required=False, type=str, 
                                  help="""Path where the newick is saved at. If the path points to a directory the 
                                  newick will be saved there inside a predictions directory. If no path is provided the 
@@ -521,19 +1061,47 @@ def main():
                                  help="""On/Off flag. If --quiet is specified all console logs will be disabled and 
                                  only the output printed out. This is useful inside a pipeline where the newick is 
                                  piped into another application.""")
+    argument_parser.add_argument("--batch", required=False, action="store_true", default=False,
+                                 help="""On/Off flag. If --batch is specified the images of all infile paths are sent 
+                                 as one batch to OpenAI's Batch API which is half as expensive but may take up to 24 
+                                 hours. The batch is polled until it is done.""")
+    argument_parser.add_argument("--low_detail", required=False, action="store_true", default=False,
+                                 help="""On/Off flag. By default images are sent in full size with OpenAI's default 
+                                 detail. If --low_detail is specified images are downscaled to at most 1024px and sent 
+                                 in low detail, which costs a fraction of the tokens but may cost accuracy on trees 
+                                 with small labels, and only sent in high detail again if no newick is found in the 
+                                 response.""")
+    argument_parser.add_argument("--cache", required=False, action="store_true", default=False,
+                                 help="""On/Off flag. By default every request is sent to the model. If --cache is 
+                                 specified responses are cached (across runs if diskcache is installed) and sending 
+                                 the same image with the same model and instructions again returns the cached 
+                                 response instead of a new one. Don't use it for evaluations, especially of models 
+                                 that dont support temperature.""")
+    argument_parser.add_argument("--max_concurrent", required=False, type=int, default=10,
+                                 help="""Maximum amount of images sent to the model at the same time if multiple infile 
+                                 paths are given. Default: 10""")
     
     # Specified parameters
     args = argument_parser.parse_args()
-    infile_path = args.infile_path
+    infile_paths = expand_infile_paths(args.infile_path)
     outfile_path = args.outfile_path
     model = args.model 
     approach = args.approach
     quiet = args.quiet
     # get_taxa_first = args.get_taxa_first
     format = args.format
+    max_concurrent = args.max_concurrent
+    batch = args.batch
+    detail = "low" if args.low_detail else "auto"
+    use_cache = args.cache
+    if len(infile_paths) > 1 and outfile_path and not os.path.isdir(outfile_path):
+        raise NotADirectoryError(f"Expected directory as outfile path for multiple infile paths: {outfile_path}")
     
-    # file ID for the current job 
-    file_id = ut.get_file_id()
+    # file ID for each job, IDs are timestamps and have to be unique since they are used as filenames
+    file_ids = []
+    while len(file_ids) < len(infile_paths):
+        if (file_id := ut.get_file_id()) not in file_ids:
+            file_ids.append(file_id)
     
     # configure logger
     logFormatter = logging.Formatter("%(asctime)s [%(levelname)-5.5s]  %(message)s")
@@ -545,61 +1113,37 @@ def main():
     else:
         console_logger.setLevel(logging.INFO)
     console_logger.info('Starting newick_extraction_openai')
-    console_logger.info(f"File ID: {file_id}")
+    console_logger.info("File IDs: %s", ", ".join(file_ids))
     
-    # create Newick_Extraction_Job object
-    extraction_job = Newick_Extraction_Job(
-        infile_path=infile_path,
-        model=model,
-        outfile_path=outfile_path,
-        file_id = file_id,
-        approach=approach,
-        
-    )
+    # create a Newick_Extraction_Job object for each infile path
+    extraction_jobs = [
+        Newick_Extraction_Job(
+            infile_path=infile_path,
+            model=model,
+            outfile_path=outfile_path,
+            file_id = file_id,
+            approach=approach,
+            detail=detail,
+            use_cache=use_cache,
+        )
+        for infile_path, file_id in zip(infile_paths, file_ids)
+    ]
     
     # decide which instructions to use
-    if approach == "extract_nwk":
-        if format=="regular":
-            instructions = instr.instr_nwk_regular
-        elif format == "taxa_only":
-            instructions = instr.instr_nwk_taxa_only
-        elif format == "topo_only":
-            instructions = instr.instr_nwk_topo_only    
-        elif format == "no_format":
-            instructions = instr.instr_nwk_all_cases
-    elif approach == "extract_topo":
-        if format=="regular":
-            instructions = instr.instr_topo_regular
-        elif format == "taxa_only":
-            instructions = instr.instr_topo_taxa_only
-        elif format == "topo_only":
-            instructions = instr.instr_topo_topo_only    
-        elif format == "no_format":
-            instructions = instr.instr_topo_all_cases
-    else:
+    instructions = instr.PROMPTS.get((approach, format))
+    if instructions is None:
         raise ValueError("No instructions implemented for chosen combination of approach and format.")
         
-    if approach == "extract_nwk":
-        # extract newick directly
-        newick = extraction_job.extract_newick_directly(instructions=instructions)
-        # set the postprocessed newick as the job objects newick
-        extraction_job.newick = extraction_job.postprocess_newick(newick)
-        if extraction_job.outfile_path:
-            extraction_job.write_extracted_newick_to_file()
-        else:
-            print(extraction_job.newick) 
-    elif approach == "extract_topo":
-        # extract topology
-        extraction_job.topology = extraction_job.extract_topology(instructions=instructions) 
-        # extract newick from topology
-        newick = extraction_job.extract_newick_from_topology()
-        # set the postprocessed newick as the job objects newick
-        extraction_job.newick = extraction_job.postprocess_newick(newick)
-        # if not outfile path is specified then print the newick to console for use in pipelines
-        if extraction_job.outfile_path:
-            extraction_job.write_extracted_newick_to_file()
-        else:
-            print(extraction_job.newick)
+    if batch:
+        newicks = run_batch(extraction_jobs, instructions)
+    elif len(extraction_jobs) == 1:
+        newicks = [run_extraction_job(extraction_jobs[0], instructions)]
+    else:
+        newicks = asyncio.run(run_many(extraction_jobs, instructions, max_concurrent=max_concurrent))
+    # if not outfile path is specified then print the newicks to console for use in pipelines
+    if not outfile_path:
+        for newick in newicks:
+            print(newick)
     
     console_logger.info('Finished newick_extraction_openai')
             
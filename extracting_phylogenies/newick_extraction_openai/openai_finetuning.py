@@ -1,10 +1,22 @@
 from openai import OpenAI
 import json
 import os
+try:
+    import orjson # json encoding straight to utf-8 bytes
+    json_bytes = orjson.dumps
+except ImportError:
+    def json_bytes(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
 from extracting_phylogenies.newick_extraction_openai import instructions as instr
 from extracting_phylogenies.image_augmentation import image_augmentation as aug
 
-import base64
+try:
+    import pybase64 as base64 # SIMD base64 encoding with the same API as base64
+except ImportError:
+    import base64
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import groupby
 
 # set client with API key
 client = OpenAI(api_key = os.getenv("BA_API_KEY"))
@@ -12,103 +24,146 @@ client = OpenAI(api_key = os.getenv("BA_API_KEY"))
 def load_dataset(dataset):
     # create list for image newick tuples
     img_nwk_pairs = []
-    # list with all data subdirectories
-    data_dirs = [data for data in os.listdir(dataset) if os.path.isdir(os.path.join(dataset, data))]
+    # list with all data subdirectories, scandir gets the file type along with the listing i.e. without an extra stat
+    with os.scandir(dataset) as dataset_entries:
+        data_paths = [entry.path for entry in dataset_entries if entry.is_dir()]
     # iterate over subdiretories
-    for data_dir in data_dirs:
-        # complete filepath of the current data dir
-        data_path = os.path.join(dataset, data_dir)
+    for data_path in data_paths:
         # get files in data directory
-        data_filepaths = [os.path.join(data_path, file) for file in os.listdir(data_path) 
-                          if os.path.isfile(os.path.join(data_path, file))]
-        nwk_path = [file for file in data_filepaths if os.path.split(file)[1].endswith("nwk")][0]
-        img_path = [file for file in data_filepaths if os.path.split(file)[1].endswith("jpg")][0]
+        with os.scandir(data_path) as data_entries:
+            data_files = [entry for entry in data_entries if entry.is_file()]
+        nwk_path = next((entry.path for entry in data_files if entry.name.endswith("nwk")), None)
+        img_path = next((entry.path for entry in data_files if entry.name.endswith("jpg")), None)
+        if nwk_path is None or img_path is None:
+            raise FileNotFoundError(f"Expected a nwk and a jpg file in {data_path}")
         with open(nwk_path, "r") as nwk_file: 
             nwk = nwk_file.read()
         img_nwk_pairs.append((img_path, nwk))
     return img_nwk_pairs
 
-def create_jsonl_entry_base64(base64_string, prompt, instructions, truth):
+# jsonl entry for openai finetuning with the separators of json.dumps, the text fields are filled in json-encoded and 
+# the base64 string as it is since it only contains [A-Za-z0-9+/=] which never needs escaping
+_JSONL_ENTRY_BASE64 = (
+    b'{"messages": [{"role": "system", "content": %s}, {"role": "user", "content": %s}, '
+    b'{"role": "user", "content": [{"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,%s"}}]}, '
+    b'{"role": "assistant", "content": %s}]}'
+)
+
+def create_jsonl_entry_base64(base64_bytes, prompt, instructions, truth):
     """
     Create entry for a JSONL for openai finetuning. The base64-encoded image is put into a data URL,
-    truth is the original newick.
+    truth is the original newick. Only the prompt, instructions and truth are json-encoded, the base64-encoded image is
+    copied into the entry once instead of being scanned for characters to escape. The entry is utf-8 encoded bytes so 
+    the base64-encoded image is never decoded into a str.
 
     Args:
-        base64_string (str): base64-encoded image
+        base64_bytes (bytes): base64-encoded image
         prompt (str): model prompt
         instructions (str): model instructions
         truth (str): original newick
 
     Returns:
-        json: json entry for openai finetuning containing prompt, instructions, image, truth
+        bytes: json entry for openai finetuning containing prompt, instructions, image, truth
+    """
+    return _JSONL_ENTRY_BASE64 % (json_bytes(instructions), json_bytes(prompt), base64_bytes, json_bytes(truth))
+
+
+image_size = 1024
+augment= aug.pad_resize_augment_wrapper(image_size=image_size, normalize=False, to_tensor=False)
+# the default augmentation only pads and resizes, jpgs of size <image_size>x<image_size> come out of it unchanged
+_default_augment = augment
+
+# augmentation, passthrough size, prompt and instructions of the worker processes of create_jsonl_file_base64, set once 
+# per worker by _init_worker
+_worker_augment = None
+_worker_passthrough_size = None
+_worker_prompt = None
+_worker_instructions = None
+
+def _init_worker(worker_augment, worker_passthrough_size, worker_prompt, worker_instructions):
+    global _worker_augment, _worker_passthrough_size, _worker_prompt, _worker_instructions
+    _worker_augment = worker_augment
+    _worker_passthrough_size = worker_passthrough_size
+    _worker_prompt = worker_prompt
+    _worker_instructions = worker_instructions
+
+def is_passthrough_image(img_path, passthrough_size):
+    """
+    Checks if the image is a jpg of size <passthrough_size> by only reading the image header i.e. without decoding it.
+
+    Args:
+        img_path (str): path to image
+        passthrough_size (tuple): width and height
+
+    Returns:
+        bool: True if the image is a jpg of the given size
+    """
+    if passthrough_size is None:
+        return False
+    with Image.open(img_path) as image:
+        return image.format == "JPEG" and image.size == tuple(passthrough_size)
+
+def _encode_one(img_newick_pair):
+    """
+    Worker of create_jsonl_file_base64. Augments and base64-encodes the image of an image/newick pair and returns the 
+    finished jsonl line.
+
+    Args:
+        img_newick_pair (tuple): image path and newick
+
+    Returns:
+        bytes: jsonl entry followed by a newline
     """
-    entry={
-        "messages":[
-            {"role":"system","content":instructions},
-            {"role":"user","content":prompt},
-            {"role":"user","content":[
-                {
-                    "type":"image_url",
-                    "image_url":{"url": f"data:image/jpeg;base64,{base64_string}"}
-                }
-            ]
-            },
-            {"role": "assistant", "content": truth}
-        ]
-    }
-    return json.dumps(entry)
-
-
-augment= aug.pad_resize_augment_wrapper(image_size=1024, normalize=False, to_tensor=False)
-
-def create_jsonl_file_base64(dataset_path, jsonl_dirpath, augment=augment, chunk_size=100):
+    img_path, newick = img_newick_pair
+    # jpgs that already have the target size are left unchanged by the augmentation so their bytes are used directly 
+    if is_passthrough_image(img_path, _worker_passthrough_size):
+        with open(img_path, "rb") as img_file:
+            augmented_jpg = img_file.read()
+    # augment image before uploading
+    else:
+        augmented_jpg = aug.get_augmented_jpg(augmentation=_worker_augment, image_path=img_path)
+    # base64-encode image for the jsonl entry
+    base64_bytes = base64.b64encode(augmented_jpg)
+    return create_jsonl_entry_base64(base64_bytes=base64_bytes, prompt=_worker_prompt, 
+                                     instructions=_worker_instructions, truth=newick) + b"\n"
+
+def create_jsonl_file_base64(dataset_path, jsonl_dirpath, augment=augment, chunk_size=100, passthrough_size=None):
     """
     Takes a path to a dataset and instead of creating one huge jsonl, splits up the jsonl into smaller jsonls of at 
-    most <chunk_size> image/nwk pairs to fly under the maximum jsonl size
+    most <chunk_size> image/nwk pairs to fly under the maximum jsonl size. The images are augmented and encoded in 
+    parallel by one worker process per CPU. Images that are already jpgs of size <passthrough_size> skip the 
+    augmentation and are encoded as they are, by default only with the default augmentation.
 
     Args:
         dataset_path (str): path to dataset
         jsonl_dirpath (str): path to directory where jsonl chunks are saved
         chunk_size (int): number 
+        passthrough_size (tuple): width and height of jpgs that the augmentation doesn't change. Defaults to None i.e. 
+        <image_size>x<image_size> with the default augmentation and augmenting every image with any other augmentation
     """
+    if passthrough_size is None and augment is _default_augment:
+        passthrough_size = (image_size, image_size)
     # load dataset 
     dataset = load_dataset(dataset_path)
-    # set counter for jsonl entries
-    entry_count = 0
-    # set file counter
-    file_count = 1
-    # initialize the file contents of current 
-    contents = "" 
-    for i in range(len(dataset)):
-        img_newick_pair = dataset[i]
-        print(f"File counter: {file_count}")
-        print(f"Entry counter: {entry_count}")
-        # get prompt and instructions from instructions file i.e. let model produce newick directly
-        prompt = instr.prompt
-        instructions = instr.instr_nwk_regular
-        # get image path
-        img_path = img_newick_pair[0]
-        # get newick
-        newick = img_newick_pair[1]
-        # augment image before uploading
-        augmented_image = aug.get_augmented_image(augmentation=augment,image_path=img_path)
-        # base64-encode image for the jsonl entry
-        base64_string = base64.b64encode(augmented_image).decode("utf-8")
-        # set json outfile path 
-        jsonl_outfile = os.path.join(jsonl_dirpath, f"data{file_count}")
-        # append the current entry
-        contents+=create_jsonl_entry_base64(base64_string=base64_string,prompt=prompt, instructions=instructions, truth=newick)
-        contents+="\n"
-        entry_count += 1
-        # make chunks of at most size 100
-        if entry_count >= chunk_size or i == len(dataset)-1:
-            # create the file if it doesnt exist, otherwise append entries  
-            with open(jsonl_outfile, "w") as jsonl:
-                jsonl.write(contents)        
-            print(f"length contents: {len(contents)}")
-            file_count += 1
-            entry_count = 0
-            contents = ""
+    # get prompt and instructions from instructions file i.e. let model produce newick directly
+    prompt = instr.prompt
+    instructions = instr.instr_nwk_regular
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker, 
+                             initargs=(augment, passthrough_size, prompt, instructions)) as executor:
+        # map keeps the order of the dataset so the chunks are the same as when encoding sequentially
+        lines = executor.map(_encode_one, dataset, chunksize=16)
+        # make chunks of at most size 100, the i-th line goes into the (i // chunk_size + 1)-th file
+        for file_index, chunk in groupby(enumerate(lines), key=lambda indexed_line: indexed_line[0] // chunk_size):
+            file_count = file_index + 1
+            print(f"File counter: {file_count}")
+            # set json outfile path 
+            jsonl_outfile = os.path.join(jsonl_dirpath, f"data{file_count}")
+            # create the file if it doesnt exist, otherwise overwrite it, every line is written as soon as it is 
+            # encoded instead of holding the whole chunk in memory
+            with open(jsonl_outfile, "wb") as jsonl:
+                for _, line in chunk:
+                    jsonl.write(line)
+                print(f"length contents: {jsonl.tell()}")
 
     
 def upload_jsonl_to_openai(jsonl_path):
@@ -122,21 +177,37 @@ def upload_jsonl_to_openai(jsonl_path):
         str: file ID
     """
     if not os.path.exists(jsonl_path):
-        FileNotFoundError(f"File not found: {jsonl_path}")
-    response = client.files.create(
-        file=open(jsonl_path, "rb"),
-        purpose="fine-tune"
-    )
+        raise FileNotFoundError(f"File not found: {jsonl_path}")
+    with open(jsonl_path, "rb") as jsonl_file:
+        response = client.files.create(
+            file=jsonl_file,
+            purpose="fine-tune"
+        )
     return response.id
 
-def upload_chunks(jsonl_dir):
+def upload_chunks(jsonl_dir, max_workers=8):
+    """
+    Uploads every jsonl chunk in the directory and returns the file IDs. The uploads are mostly waiting for the 
+    network so up to <max_workers> chunks are uploaded at the same time.
+
+    Args:
+        jsonl_dir (str): path to directory with the jsonl chunks
+        max_workers (int): maximum number of concurrent uploads
+
+    Raises:
+        ValueError: if the directory has no files
+
+    Returns:
+        list: file IDs in the order of the chunks
+    """
     chunks = [os.path.join(jsonl_dir, file) for file in os.listdir(jsonl_dir) 
                                         if os.path.isfile(os.path.join(jsonl_dir, file))]
     if chunks:
-        for chunk in chunks:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            file_ids = list(executor.map(upload_jsonl_to_openai, chunks))
+        for chunk, file_id in zip(chunks, file_ids):
             print(f"Chunk: {chunk}")
-            file_id = upload_jsonl_to_openai(chunk)
             print(file_id)
+        return file_ids
     else:
         raise ValueError(f"No chunks to upload, dir has no files: {jsonl_dir}")
-        
@@ -1,6 +1,59 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sb
+try:
+    import pyarrow # multithreaded csv parser of pandas
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+def get_model_labels(newick_paths):
+    """
+    Labels every row with the model that extracted the newick based on the path of the extracted newick.
+
+    Args:
+        newick_paths (pd.Series): paths of the extracted newicks i.e. the newick2 column
+
+    Returns:
+        np.ndarray: model labels
+    """
+    is_gpt5 = newick_paths.str.contains("gpt-5", regex=False, na=False)
+    is_gpt41_finetuned = newick_paths.str.contains("gpt-4.1_finetuned", regex=False, na=False)
+    return np.select([is_gpt5, is_gpt41_finetuned], ["GPT-5", "GPT-4.1-ft"], default="GPT-4.1")
+
+def get_mean_per_taxa_count(dataframe, metrics):
+    """
+    Averages the metrics per model and count of taxa of the original tree i.e. the points of the line plots.
+
+    Args:
+        dataframe (pd.DataFrame): labelled statistics
+        metrics (list): columns to average
+
+    Returns:
+        pd.DataFrame: Model, count_taxa1 and the mean of every metric
+    """
+    return dataframe.groupby(["Model", "count_taxa1"])[metrics].mean().reset_index()
+
+def plot_mean_per_taxa_count(ax, aggregate, metric, title, ylabel):
+    """
+    Plots one line per model of the averaged metric over the count of taxa and saves the plot under its title. The 
+    axes are cleared first so that one figure can be reused for every plot.
+
+    Args:
+        ax (matplotlib.axes.Axes): axes to plot on
+        aggregate (pd.DataFrame): output of get_mean_per_taxa_count
+        metric (str): column to plot
+        title (str): title and filename of the plot
+        ylabel (str): label of the y axis
+    """
+    ax.clear()
+    for model, model_aggregate in aggregate.groupby("Model"):
+        ax.plot(model_aggregate["count_taxa1"], model_aggregate[metric], marker="o", label=model)
+    ax.legend(title="Model")
+    ax.set_title(title)
+    ax.set_xlabel("Count of Taxa")
+    ax.set_ylabel(ylabel)
+    ax.figure.savefig(title)
 
 def main():
     path_branchlengths = r"C:\Users\marku\Desktop\StudiumVault\Semester6\Bachelorarbeit\Code\Extracting-Phylogenies-from-Images-using-AI\results_topo\finetuned_nwk_branchlengths.tsv"
@@ -9,76 +62,55 @@ def main():
     # path_branchlengths = r"C:\Users\marku\Desktop\StudiumVault\Semester6\Bachelorarbeit\Code\Extracting-Phylogenies-from-Images-using-AI\qwen2_branchlengths.tsv"
     # path_no_branchlenghts = r"C:\Users\marku\Desktop\StudiumVault\Semester6\Bachelorarbeit\Code\Extracting-Phylogenies-from-Images-using-AI\qwen2_no_branchlengths.tsv"
     
-    branchlength_dataframe = pd.read_csv(path_branchlengths, sep="\t", header=0)
-    no_branchlength_dataframe = pd.read_csv(path_no_branchlenghts, sep="\t", header=0)
+    branchlength_dataframe = pd.read_csv(path_branchlengths, sep="\t", header=0, engine=CSV_ENGINE)
+    no_branchlength_dataframe = pd.read_csv(path_no_branchlenghts, sep="\t", header=0, engine=CSV_ENGINE)
+    # label the rows once, the merged dataframe inherits the labels
+    branchlength_dataframe["Model"] = get_model_labels(branchlength_dataframe["newick2"])
+    no_branchlength_dataframe["Model"] = get_model_labels(no_branchlength_dataframe["newick2"])
     merged_dataframe = pd.concat([branchlength_dataframe, no_branchlength_dataframe], ignore_index=True)
     
-    merged_dataframe["Model"] = merged_dataframe["newick2"].map(lambda x: "GPT-5" if "gpt-5" in x else "GPT-4.1-ft" if "gpt-4.1_finetuned" in x else "GPT-4.1")
-    plt.figure(figsize=(10, 6))
-    sb.lineplot(data=merged_dataframe, x="count_taxa1", y="rf_ratio", hue="Model", marker="o")
-    plt.title("RF Distance Ratio Distribution of OpenAI models")
-    plt.xlabel("Count of Taxa")
-    plt.ylabel("Mean RF Distance Ratio per tree")
-    plt.savefig("RF Distance Ratio Distribution of OpenAI models")
-    
-    
-    merged_dataframe["Model"] = merged_dataframe["newick2"].map(lambda x: "GPT-5" if "gpt-5" in x else "GPT-4.1-ft" if "gpt-4.1_finetuned" in x else "GPT-4.1")
-    plt.figure(figsize=(10, 6))
-    sb.lineplot(data=merged_dataframe, x="count_taxa1", y="correct_edge_ratio", hue="Model", marker="o")
-    plt.title("Correct Edge Ratio Distribution of OpenAI models")
-    plt.xlabel("Count of Taxa")
-    plt.ylabel("Mean Correct Edge Ratio per tree")
-    plt.savefig("Correct Edge Ratio Distribution of OpenAI models")
-    
-    merged_dataframe["Model"] = merged_dataframe["newick2"].map(lambda x: "GPT-5" if "gpt-5" in x else "GPT-4.1-ft" if "gpt-4.1_finetuned" in x else "GPT-4.1")
-    plt.figure(figsize=(10, 6))
-    sb.lineplot(data=merged_dataframe, x="count_taxa1", y="correct_taxa_ratio", hue="Model", marker="o")
-    plt.title("Correct Taxa Ratio Distribution of OpenAI models")
-    plt.xlabel("Count of Taxa")
-    plt.ylabel("Mean Correct Taxa Ratio per tree")
-    plt.savefig("Correct Taxa Ratio Distribution of OpenAI models")
-    
-    branchlength_dataframe["Model"] = branchlength_dataframe["newick2"].map(lambda x: "GPT-5" if "gpt-5" in x else "GPT-4.1-ft" if "gpt-4.1_finetuned" in x else "GPT-4.1")
-    plt.figure(figsize=(10, 6))
-    sb.lineplot(data=branchlength_dataframe, x="count_taxa1", y="mean_abs_diff_leaf_dists", hue="Model", marker="o")
-    plt.title("Leaf-to-parent branch length difference on trees with branch labels of OpenAI models")
-    plt.xlabel("Count of Taxa")
-    plt.ylabel("Mean Absolute Leaf-to-Parent Branch Length Difference per tree")
-    plt.savefig("Leaf-to-parent branch length difference on trees with branch labels of OpenAI models")
-    
-    no_branchlength_dataframe["Model"] = no_branchlength_dataframe["newick2"].map(lambda x: "GPT-5" if "gpt-5" in x else "GPT-4.1-ft" if "gpt-4.1_finetuned" in x else "GPT-4.1")
-    plt.figure(figsize=(10, 6))
-    sb.lineplot(data=no_branchlength_dataframe, x="count_taxa1", y="mean_abs_diff_leaf_dists", hue="Model", marker="o")
-    plt.title("Leaf-to-Parent Branch Length Difference on trees without branch labels of OpenAI models")
-    plt.xlabel("Count of Taxa")
-    plt.ylabel("Mean Absolute Leaf-to-Parent Branch Length Difference per tree")
-    plt.savefig("Leaf-to-Parent Branch Length Difference on trees without branch labels of OpenAI models")
-    
-    branchlength_dataframe["Model"] = branchlength_dataframe["newick2"].map(lambda x: "GPT-5" if "gpt-5" in x else "GPT-4.1-ft" if "gpt-4.1_finetuned" in x else "GPT-4.1")
-    plt.figure(figsize=(10, 6))
-    sb.lineplot(data=branchlength_dataframe, x="count_taxa1", y="mean_pairwise_dist_diff", hue="Model", marker="o")
-    plt.title("Pairwise leaf-to-leaf distance on trees with branch labels of OpenAI models")
-    plt.xlabel("Count of Taxa")
-    plt.ylabel("Mean of Mean Pairwise Leaf-to-Leaf Distance per tree")
-    plt.savefig("Pairwise leaf-to-leaf distance on trees with branch labels of OpenAI models")
-    
-    no_branchlength_dataframe["Model"] = no_branchlength_dataframe["newick2"].map(lambda x: "GPT-5" if "gpt-5" in x else "GPT-4.1-ft" if "gpt-4.1_finetuned" in x else "GPT-4.1")
-    plt.figure(figsize=(10, 6))
-    sb.lineplot(data=no_branchlength_dataframe, x="count_taxa1", y="mean_pairwise_dist_diff", hue="Model", marker="o")
-    plt.title("Pairwise Leaf-to-Leaf Distance Difference on trees without branch labels of OpenAI models")
-    plt.xlabel("Count of Taxa")
-    plt.ylabel("Mean of Mean Pairwise Leaf-to-Leaf Distance per tree")
-    plt.savefig("Pairwise Leaf-to-Leaf Distance Difference on trees without branch labels of OpenAI models")
-    
     # expected amount taxa - actual amount taxa
-    merged_dataframe["Model"] = merged_dataframe["newick2"].map(lambda x: "GPT-5" if "gpt-5" in x else "GPT-4.1-ft" if "gpt-4.1_finetuned" in x else "GPT-4.1")
     merged_dataframe["difference_taxa"] = abs(merged_dataframe["count_taxa1"] - merged_dataframe["count_taxa2"] )
-    plt.figure(figsize=(10, 6))
-    sb.lineplot(data=merged_dataframe, x="count_taxa1", y="difference_taxa", hue="Model", marker="o")
-    plt.title("Absolute Difference of expected and actual Amount of Taxa of OpenAI models")
-    plt.xlabel("Count of Taxa")
-    plt.ylabel("Mean Absolute Taxa Count Difference per tree")
-    plt.savefig("Absolute Difference of expected and actual Amount of Taxa of OpenAI models")
+    # mean of every plotted metric per model and taxa count, computed once per dataframe for all plots
+    merged_aggregate = get_mean_per_taxa_count(merged_dataframe, ["rf_ratio", "correct_edge_ratio", 
+                                                                  "correct_taxa_ratio", "difference_taxa"])
+    branchlength_aggregate = get_mean_per_taxa_count(branchlength_dataframe, ["mean_abs_diff_leaf_dists", 
+                                                                              "mean_pairwise_dist_diff"])
+    no_branchlength_aggregate = get_mean_per_taxa_count(no_branchlength_dataframe, ["mean_abs_diff_leaf_dists", 
+                                                                                    "mean_pairwise_dist_diff"])
+    # one figure for all plots, every plot clears and redraws its axes
+    fig, ax = plt.subplots(figsize=(10, 6))
+    
+    plot_mean_per_taxa_count(ax, merged_aggregate, "rf_ratio", "RF Distance Ratio Distribution of OpenAI models", 
+                             "Mean RF Distance Ratio per tree")
+    
+    plot_mean_per_taxa_count(ax, merged_aggregate, "correct_edge_ratio", 
+                             "Correct Edge Ratio Distribution of OpenAI models", 
+                             "Mean Correct Edge Ratio per tree")
+    
+    plot_mean_per_taxa_count(ax, merged_aggregate, "correct_taxa_ratio", 
+                             "Correct Taxa Ratio Distribution of OpenAI models", 
+                             "Mean Correct Taxa Ratio per tree")
+    
+    plot_mean_per_taxa_count(ax, branchlength_aggregate, "mean_abs_diff_leaf_dists", 
+                             "Leaf-to-parent branch length difference on trees with branch labels of OpenAI models", 
+                             "Mean Absolute Leaf-to-Parent Branch Length Difference per tree")
+    
+    plot_mean_per_taxa_count(ax, no_branchlength_aggregate, "mean_abs_diff_leaf_dists", 
+                             "Leaf-to-Parent Branch Length Difference on trees without branch labels of OpenAI models", 
+                             "Mean Absolute Leaf-to-Parent Branch Length Difference per tree")
+    
+    plot_mean_per_taxa_count(ax, branchlength_aggregate, "mean_pairwise_dist_diff", 
+                             "Pairwise leaf-to-leaf distance on trees with branch labels of OpenAI models", 
+                             "Mean of Mean Pairwise Leaf-to-Leaf Distance per tree")
+    
+    plot_mean_per_taxa_count(ax, no_branchlength_aggregate, "mean_pairwise_dist_diff", 
+                             "Pairwise Leaf-to-Leaf Distance Difference on trees without branch labels of OpenAI models", 
+                             "Mean of Mean Pairwise Leaf-to-Leaf Distance per tree")
+    
+    plot_mean_per_taxa_count(ax, merged_aggregate, "difference_taxa", 
+                             "Absolute Difference of expected and actual Amount of Taxa of OpenAI models", 
+                             "Mean Absolute Taxa Count Difference per tree")
     # plt.show()
     
     
@@ -3,10 +3,15 @@ import re
 from ete3 import Tree
 import logging
 import os 
+import sys
 
 # logs
 logger = logging.getLogger(__name__)
 
+# taxa are expected right after a '(' or ',' and right before ':', ')' or ','
+# special characters allowed inside the taxa: _ . - " ' / and #
+TAXA_PATTERN = re.compile(r"(?<=[,(])[\d\w\.\-\"\'#\/]+(?=[\:\)\,])")
+
 # time for logs
 def get_time():
     return datetime.datetime.now().strftime("%Y-%b-%d %H:%M:%S")
@@ -82,12 +87,25 @@ def is_newick(newick, format=0):
     Returns:
         bool: True only if the formatting is valid
     """
+    return get_tree(newick, format=format) is not None
+
+def get_tree(newick, format=0):
+    """
+    Given a newick string returns its ete3 Tree or None if it isn't parseable in the given format (see is_newick). 
+    Lets callers check the formatting and keep working on the tree without parsing the newick again.
+
+    Args:
+        newick (str): Newick string
+        format (int): format of the newick according to the ETE3 toolkit
+
+    Returns:
+        Tree: tree of the newick or None if the formatting is invalid
+    """
     try:
-        tree = Tree(newick, format=format)
+        return Tree(newick, format=format)
     except Exception as e:
         logger.info(f"Newick not parseable: {e}")
-        return False
-    return True
+        return None
 
 def get_newick_format(newick):
     """
@@ -141,7 +159,7 @@ def remove_taxa_from_newick(newick):
     Returns:
         str: newick string without taxa
     """
-    return re.sub(r"(?<=[,(])[\d\w\.\-\"\'#\/]+(?=[\:\)\,])", "", newick)
+    return TAXA_PATTERN.sub("", newick)
 
 def get_taxa(newick):
     """
@@ -154,7 +172,8 @@ def get_taxa(newick):
     Returns:
         List(str): List of all taxa found 
     """
-    return re.findall(r"(?<=[,(])[\d\w\.\-\"\'#\/]+(?=[\:\)\,])", newick)
+    # interned taxa are shared across newicks and compare by identity in dicts and sets
+    return [sys.intern(taxon) for taxon in TAXA_PATTERN.findall(newick)]
 
 def remove_special_chars(taxon):
     r"""
@@ -246,12 +265,16 @@ def get_bool_from_string(string):
     
 def remove_duplicate_leaves(newick):
         # remove duplicated leaves if there are any
-        leaves_seen = []
         tree = Tree(newick)
+        detach_duplicate_leaves(tree)
+        return tree.write()
+
+def detach_duplicate_leaves(tree):
+        # detach every leaf whose name was already seen in level order from the tree in place
+        leaves_seen = set()
         leaves = [leaf for leaf in tree.traverse() if leaf.is_leaf()]
         for leaf in leaves:
             if leaf.name in leaves_seen:
                 leaf.detach()
             else:
-                leaves_seen.append(leaf.name)
-        return tree.write()
\ No newline at end of file
+                leaves_seen.add(leaf.name)
\ No newline at end of file